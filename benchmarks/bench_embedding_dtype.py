@@ -0,0 +1,107 @@
+"""
+Benchmark: embedding_dtype float16 / int8 (with and without float32
+rescoring) against the float32 baseline.
+
+    python benchmarks/bench_embedding_dtype.py [--rows 200000] [--dim 384] [--queries 200] [--rescore-k 50]
+    python benchmarks/bench_embedding_dtype.py --dataset abt-buy   # real MiniLM embeddings, needs [deep]
+
+Every query is scored against the whole matrix with the same code path
+the models use (matchify.quantization.score_rows / rescore_top). The
+script reports matrix memory, mean latency per query, MRR of the first
+same-group record and top-10 overlap with the float32 ranking.
+
+Without --dataset the matrix is synthetic: rows are noisy copies of
+group centres, so MRR is well defined without an encoder.
+"""
+import argparse
+import os
+import tempfile
+import time
+
+import numpy as np
+import pandas as pd
+
+from matchify import quantization
+from matchify.datasets import DATASETS
+
+
+def _synthetic(rows, dim, seed=0):
+    rng = np.random.default_rng(seed)
+    n_groups = max(1, rows // 3)
+    groups = rng.integers(0, n_groups, rows)
+    centres = rng.normal(size=(n_groups, dim)).astype(np.float32)
+    vectors = centres[groups] + 2.0 * rng.normal(size=(rows, dim)).astype(np.float32)
+    vectors /= np.linalg.norm(vectors, axis=1, keepdims=True)
+    return vectors, groups
+
+
+def _encoded(dataset):
+    from matchify.models.bert_match_model import BertMatchModel
+
+    cfg = DATASETS[dataset]
+    df = pd.read_csv(cfg['path'])
+    model = BertMatchModel(df, field_config=cfg['field_config'], ignored_columns=cfg['ignored_columns'])
+    model.train()
+    return np.asarray(model.embeddings, dtype=np.float32), df['group_id'].to_numpy()
+
+
+def _run(matrix, vectors, groups, queries, exact=None, rescore_k=None):
+    positions = np.arange(len(vectors))
+    reciprocal, overlap, elapsed = [], [], 0.0
+    for q in queries:
+        start = time.perf_counter()
+        scores = quantization.score_rows(matrix, vectors[q], positions)
+        if exact is not None:
+            scores = quantization.rescore_top(scores, positions, vectors[q], exact, rescore_k)
+        elapsed += time.perf_counter() - start
+
+        scores[q] = -np.inf
+        order = np.argsort(-scores, kind='stable')
+        hits = np.flatnonzero(groups[order] == groups[q])
+        reciprocal.append(1.0 / (hits[0] + 1) if len(hits) else 0.0)
+
+        baseline = vectors @ vectors[q]
+        baseline[q] = -np.inf
+        overlap.append(len(set(order[:10]) & set(np.argsort(-baseline)[:10])) / 10)
+    return elapsed / len(queries), float(np.mean(reciprocal)), float(np.mean(overlap))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--dataset', default=None, choices=sorted(DATASETS))
+    parser.add_argument('--rows', type=int, default=200_000)
+    parser.add_argument('--dim', type=int, default=384)
+    parser.add_argument('--queries', type=int, default=200)
+    parser.add_argument('--rescore-k', type=int, default=50)
+    args = parser.parse_args()
+
+    if args.dataset:
+        vectors, groups = _encoded(args.dataset)
+        source = args.dataset
+    else:
+        vectors, groups = _synthetic(args.rows, args.dim)
+        source = 'synthetic'
+    rng = np.random.default_rng(1)
+    # only queries whose group has another member, so MRR is defined
+    has_match = pd.Series(groups).duplicated(keep=False).to_numpy()
+    queries = rng.choice(np.flatnonzero(has_match), min(args.queries, int(has_match.sum())), replace=False)
+    print(f"{source}: {len(vectors):,} rows x {vectors.shape[1]} dims, {len(queries)} queries")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        exact = quantization.write_exact_copy(vectors, os.path.join(tmp, 'exact.npy'))
+        runs = [
+            ('float32', quantization.quantize(vectors, 'float32'), None),
+            ('float16', quantization.quantize(vectors, 'float16'), None),
+            ('int8', quantization.quantize(vectors, 'int8'), None),
+            (f'int8 + rescore@{args.rescore_k}', quantization.quantize(vectors, 'int8'), exact),
+        ]
+        for label, matrix, rescore in runs:
+            latency, mrr, overlap = _run(matrix, vectors, groups, queries, rescore, args.rescore_k)
+            print(
+                f"  {label:<20} memory {matrix.nbytes / 2**20:9.1f} MiB   "
+                f"latency {latency * 1e3:8.2f} ms/query   MRR {mrr:.4f}   top-10 overlap {overlap:.3f}"
+            )
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,292 @@
+"""
+Approximate nearest-neighbour retrieval over an embedding matrix.
+
+BertMatchModel and SiameseMatchModel score a query against every
+blocked candidate with a dense dot product. Without blocking that is
+O(n * d) per query. An ANN index built once over the L2-normalized
+embedding matrix returns the top k rows by inner product (cosine) from
+a fraction of the matrix instead.
+
+IVFFlatIndex is plain NumPy. FaissIndex wraps faiss-cpu's IndexIVFFlat
+when faiss is installed. Both take the same knobs: nlist cells and
+nprobe cells scanned per query. Both can be persisted to an .npz file
+through index_path.
+"""
+import hashlib
+import os
+
+import numpy as np
+
+from matchify.quantization import QuantizedEmbeddings
+
+# rows scored against the centroids per matmul while assigning cells
+_ASSIGN_CHUNK = 65536
+# rows fed to sha256 per update while fingerprinting for index_path
+_HASH_CHUNK = 65536
+
+
+def _as_matrix(vectors):
+    # float16/int8 QuantizedEmbeddings stay compact. their row gathers
+    # come back as float32, which is all the index needs.
+    if isinstance(vectors, QuantizedEmbeddings):
+        return vectors
+    return np.ascontiguousarray(vectors, dtype=np.float32)
+
+
+def _fingerprint(vectors, params) -> str:
+    # only computed when index_path is set. the matrix is hashed a chunk
+    # of rows at a time straight from its buffer, never copied whole.
+    h = hashlib.sha256()
+    h.update(repr(params).encode())
+    h.update(repr(vectors.shape).encode())
+    if isinstance(vectors, QuantizedEmbeddings):
+        h.update(vectors.dtype.encode())
+        arrays = [vectors.data] if vectors.scales is None else [vectors.data, vectors.scales]
+    else:
+        arrays = [vectors]
+    for array in arrays:
+        array = np.ascontiguousarray(array)
+        for start in range(0, len(array), _HASH_CHUNK):
+            h.update(memoryview(array[start:start + _HASH_CHUNK]).cast('B'))
+    return h.hexdigest()
+
+
+def default_nlist(n) -> int:
+    # the usual sqrt(n) rule of thumb, scaled so cells stay a few hundred rows
+    return int(min(max(1, 4 * np.sqrt(n)), max(1, n)))
+
+
+class IVFFlatIndex:
+    """
+    Inverted-file index with exact (flat) scoring inside each cell.
+
+    Spherical k-means splits the rows into nlist cells. A query scores
+    the nlist centroids, then every row in its nprobe best cells, and
+    keeps the top k. nprobe is the recall-vs-latency knob. nprobe=nlist
+    scans everything and is exact; smaller values scan about
+    nprobe / nlist of the matrix. It can also be passed per search.
+
+    Cells are stored as row positions sorted by cell plus per-cell
+    offsets. The vectors themselves are not copied: the index scores
+    against the matrix it was built over.
+
+    With index_path set, centroids and cell tables are saved to that
+    .npz file and reloaded on the next construction over the same
+    vectors and parameters instead of rerunning k-means.
+    """
+    def __init__(self, vectors, nlist=None, nprobe=8, n_iter=10, max_train_rows=None,
+                 seed=0, index_path=None):
+        self.vectors = _as_matrix(vectors)
+        n = len(self.vectors)
+        self.nlist = min(nlist or default_nlist(n), max(n, 1))
+        self.nprobe = nprobe
+        self.n_iter = n_iter
+        # k-means on a sample is enough to place centroids on big matrices
+        self.max_train_rows = max_train_rows or 256 * self.nlist
+
+        fingerprint = None
+        if index_path:
+            fingerprint = _fingerprint(self.vectors, (self.nlist, n_iter, self.max_train_rows, seed))
+            if self._load(index_path, fingerprint):
+                return
+        self.centroids = self._train(np.random.default_rng(seed))
+        cells = self._assign(self.vectors)
+        self.cell_positions = np.argsort(cells, kind='stable').astype(np.int64)
+        self.cell_offsets = np.concatenate(
+            ([0], np.cumsum(np.bincount(cells, minlength=self.nlist)))
+        ).astype(np.int64)
+        if index_path:
+            self._save(index_path, fingerprint)
+
+    def __len__(self):
+        return len(self.vectors)
+
+    def _assign(self, vectors) -> np.ndarray:
+        cells = np.empty(len(vectors), dtype=np.int64)
+        for start in range(0, len(vectors), _ASSIGN_CHUNK):
+            chunk = vectors[start:start + _ASSIGN_CHUNK]
+            cells[start:start + len(chunk)] = np.argmax(chunk @ self.centroids.T, axis=1)
+        return cells
+
+    def _train(self, rng) -> np.ndarray:
+        n = len(self.vectors)
+        if n == 0:
+            return np.zeros((0, self.vectors.shape[1]), dtype=np.float32)
+        sample = self.vectors
+        if n > self.max_train_rows:
+            sample = self.vectors[np.sort(rng.choice(n, self.max_train_rows, replace=False))]
+        self.centroids = sample[rng.choice(len(sample), self.nlist, replace=False)].copy()
+        for _ in range(self.n_iter):
+            cells = self._assign(sample)
+            order = np.argsort(cells, kind='stable')
+            counts = np.bincount(cells, minlength=self.nlist)
+            sums = np.zeros_like(self.centroids)
+            filled = np.flatnonzero(counts)
+            starts = np.concatenate(([0], np.cumsum(counts)))[filled]
+            sums[filled] = np.add.reduceat(sample[order], starts, axis=0)
+            # an empty cell is reseeded on a random row
+            empty = np.flatnonzero(counts == 0)
+            sums[empty] = sample[rng.choice(len(sample), len(empty))]
+            norms = np.linalg.norm(sums, axis=1, keepdims=True)
+            self.centroids = sums / np.where(norms > 0, norms, 1)
+        return self.centroids.astype(np.float32)
+
+    def search(self, queries, k, nprobe=None):
+        """
+        Top k rows for each query by inner product. Returns (scores,
+        positions), both shape (m, k), best first. Queries with fewer
+        than k rows in their probed cells are padded with -inf / -1.
+        """
+        queries = np.atleast_2d(np.asarray(queries, dtype=np.float32))
+        nprobe = min(nprobe or self.nprobe, self.nlist)
+        scores = np.full((len(queries), k), -np.inf, dtype=np.float32)
+        positions = np.full((len(queries), k), -1, dtype=np.int64)
+        if not len(self.vectors) or k <= 0:
+            return scores, positions
+
+        centroid_scores = queries @ self.centroids.T
+        if nprobe < self.nlist:
+            probes = np.argpartition(-centroid_scores, nprobe - 1, axis=1)[:, :nprobe]
+        else:
+            probes = np.broadcast_to(np.arange(self.nlist), (len(queries), self.nlist))
+        for i, query in enumerate(queries):
+            rows = np.concatenate([
+                self.cell_positions[self.cell_offsets[c]:self.cell_offsets[c + 1]] for c in probes[i]
+            ])
+            found, best = _top_k(self.vectors[rows] @ query, k)
+            scores[i, :len(best)] = found
+            positions[i, :len(best)] = rows[best]
+        return scores, positions
+
+    def _save(self, index_path, fingerprint):
+        _save_npz(
+            index_path,
+            fingerprint=np.array(fingerprint),
+            centroids=self.centroids,
+            cell_positions=self.cell_positions,
+            cell_offsets=self.cell_offsets,
+        )
+
+    def _load(self, index_path, fingerprint) -> bool:
+        if not os.path.isfile(index_path):
+            return False
+        with np.load(index_path) as stored:
+            if str(stored['fingerprint']) != fingerprint:
+                return False
+            self.centroids = stored['centroids']
+            self.cell_positions = stored['cell_positions']
+            self.cell_offsets = stored['cell_offsets']
+        return True
+
+
+class FaissIndex:
+    """
+    faiss-cpu IndexIVFFlat with the inner-product metric, same knobs and
+    search() contract as IVFFlatIndex. The trained index is serialized
+    into the index_path .npz next to its fingerprint.
+    """
+    def __init__(self, vectors, nlist=None, nprobe=8, n_iter=10, max_train_rows=None,
+                 seed=0, index_path=None):
+        import faiss
+
+        self._faiss = faiss
+        if isinstance(vectors, QuantizedEmbeddings):
+            # faiss wants a dense float32 matrix to add
+            vectors = vectors.dequantize()
+        vectors = np.ascontiguousarray(vectors, dtype=np.float32)
+        n, dim = vectors.shape
+        self.nlist = min(nlist or default_nlist(n), max(n, 1))
+        self.nprobe = nprobe
+        self._size = n
+
+        fingerprint = None
+        if index_path:
+            fingerprint = _fingerprint(vectors, ('faiss', self.nlist, n_iter, max_train_rows, seed))
+            if self._load(index_path, fingerprint):
+                return
+        quantizer = faiss.IndexFlatIP(dim)
+        self.index = faiss.IndexIVFFlat(quantizer, dim, self.nlist, faiss.METRIC_INNER_PRODUCT)
+        self.index.cp.niter = n_iter
+        self.index.cp.seed = seed
+        if max_train_rows:
+            self.index.cp.max_points_per_centroid = max(1, max_train_rows // self.nlist)
+        self.index.train(vectors)
+        self.index.add(vectors)
+        if index_path:
+            _save_npz(
+                index_path,
+                fingerprint=np.array(fingerprint),
+                index=faiss.serialize_index(self.index),
+            )
+
+    def __len__(self):
+        return self._size
+
+    def _load(self, index_path, fingerprint) -> bool:
+        if not os.path.isfile(index_path):
+            return False
+        with np.load(index_path) as stored:
+            if str(stored['fingerprint']) != fingerprint:
+                return False
+            self.index = self._faiss.deserialize_index(stored['index'])
+        return True
+
+    def search(self, queries, k, nprobe=None):
+        queries = np.ascontiguousarray(np.atleast_2d(queries), dtype=np.float32)
+        self.index.nprobe = min(nprobe or self.nprobe, self.nlist)
+        scores, positions = self.index.search(queries, k)
+        scores[positions < 0] = -np.inf
+        return scores, positions.astype(np.int64)
+
+
+def _top_k(scores, k):
+    # (top scores, their indices) best first. argpartition keeps it
+    # linear in the number of scanned rows.
+    if len(scores) > k:
+        best = np.argpartition(-scores, k - 1)[:k]
+    else:
+        best = np.arange(len(scores))
+    best = best[np.argsort(-scores[best], kind='stable')]
+    return scores[best], best
+
+
+def _save_npz(index_path, **arrays):
+    directory = os.path.dirname(index_path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    # np.savez appends .npz to names without it, so write through a handle
+    tmp_path = index_path + '.tmp'
+    with open(tmp_path, 'wb') as f:
+        np.savez(f, **arrays)
+    os.replace(tmp_path, index_path)
+
+
+def faiss_available() -> bool:
+    try:
+        import faiss  # noqa: F401
+    except ImportError:
+        return False
+    return True
+
+
+def build_ann_index(vectors, config):
+    """
+    ANN index over vectors for an ann_config dict. Keys: 'backend'
+    ('auto', 'numpy' or 'faiss'; auto picks faiss when it is installed),
+    'nlist', 'nprobe', 'n_iter', 'max_train_rows', 'seed', 'index_path'.
+    """
+    backend = config.get('backend', 'auto')
+    if backend not in ('auto', 'numpy', 'faiss'):
+        raise ValueError(f"Unsupported ann backend: {backend}")
+    if backend == 'faiss' and not faiss_available():
+        raise ImportError("ann backend 'faiss' requires faiss-cpu: pip install faiss-cpu")
+    index_class = FaissIndex if backend == 'faiss' or (backend == 'auto' and faiss_available()) else IVFFlatIndex
+    return index_class(
+        vectors,
+        nlist=config.get('nlist'),
+        nprobe=config.get('nprobe', 8),
+        n_iter=config.get('n_iter', 10),
+        max_train_rows=config.get('max_train_rows'),
+        seed=config.get('seed', 0),
+        index_path=config.get('index_path'),
+    )
@@ -0,0 +1,54 @@
+"""
+Seed-independent artifacts shared across models built on one dataset.
+
+Normalized columns, blocking indexes, fitted TF-IDF vectorizers and
+token stores depend only on the data, field_config and blocking_config,
+not on random_state. When model-comparisons runs several seeds (and
+several models), one DatasetArtifacts bundle per dataset lets every
+model reuse them, so only pair sampling and classifier fitting repeat
+per seed.
+"""
+
+
+class DatasetArtifacts:
+    """
+    Keyed memo for one dataset. get(key, builder) returns the stored
+    artifact for key, building it with builder() on first use.
+
+    Models key their artifacts by model class, artifact name and their
+    field/blocking config, so a bundle only hands an artifact back to a
+    model configured the same way. Shared artifacts are treated as
+    read-only; models copy anything they go on to mutate.
+    """
+    def __init__(self, name=None):
+        self.name = name
+        self._entries = {}
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self):
+        return len(self._entries)
+
+    def __contains__(self, key):
+        return key in self._entries
+
+    def get(self, key, builder):
+        if key in self._entries:
+            self.hits += 1
+            return self._entries[key]
+        self.misses += 1
+        value = builder()
+        self._entries[key] = value
+        return value
+
+    def clear(self):
+        self._entries.clear()
+        self.hits = self.misses = 0
+
+    def __getstate__(self):
+        # evaluation workers only predict, so a pickled model ships an
+        # empty bundle rather than every other model's artifacts
+        return {'name': self.name, '_entries': {}, 'hits': 0, 'misses': 0}
+
+    def summary(self) -> str:
+        return f"{len(self._entries)} artifacts, {self.hits} reused, {self.misses} built"
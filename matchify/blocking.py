@@ -0,0 +1,432 @@
+"""
+Blocking indexes shared by the models.
+
+Indexes are built once from the preprocessed blocking column when a
+model is constructed. Every predict call then looks its candidates up
+instead of re-scanning the column. Lookups return integer row positions
+into the indexed frame. Models map them back to index labels.
+"""
+import hashlib
+import os
+import re
+import zlib
+
+import numpy as np
+import pandas as pd
+
+_EMPTY = np.array([], dtype=np.int64)
+
+
+class KeyIndex:
+    """
+    Exact-key index for the prefix and block methods. Each key maps to the
+    positions of the rows carrying it, so a lookup costs O(block size)
+    instead of a full-column comparison. Positions come back in ascending
+    order, the same order a boolean mask over the column would give.
+    """
+    def __init__(self, keys):
+        codes, uniques = pd.factorize(pd.Series(keys, dtype=object))
+        order = np.argsort(codes, kind='stable')
+        sorted_codes = codes[order]
+        # rows with a missing key (code -1) sort first and are never returned
+        start = np.searchsorted(sorted_codes, 0)
+        self.positions = order[start:].astype(np.int64)
+        self.offsets = np.searchsorted(sorted_codes[start:], np.arange(len(uniques) + 1))
+        self._slot = {key: i for i, key in enumerate(uniques)}
+
+    def __len__(self):
+        return len(self._slot)
+
+    def lookup(self, key) -> np.ndarray:
+        try:
+            i = self._slot.get(key)
+        except TypeError:
+            return _EMPTY
+        if i is None:
+            return _EMPTY
+        return self.positions[self.offsets[i]:self.offsets[i + 1]]
+
+
+class SortedNeighborhoodIndex:
+    """
+    Sorted-neighborhood index. The key column is sorted once and the sorted
+    keys plus the row permutation are cached. A query is a searchsorted into
+    the cached keys and a slice of the permutation around the insert
+    position, O(log n + window) instead of a full sort per query.
+
+    Window semantics (blocking config keys):
+        threshold      rows taken on each side of the insert position
+                       ('window': 'fixed', the default).
+        window         'adaptive' sizes the window by local key density:
+                       it spans the run of sorted keys sharing the query's
+                       first prefix_length characters, clipped to
+                       max_threshold rows per side and never narrower than
+                       min_threshold. Dense key regions get a wide window,
+                       sparse regions a narrow one.
+        prefix_length  default 2.
+        min_threshold  default max(1, threshold // 2).
+        max_threshold  default 4 * threshold.
+
+    Rows with a missing key sort last, like DataFrame.sort_values.
+    """
+    def __init__(self, keys, threshold, window='fixed', prefix_length=2,
+                 min_threshold=None, max_threshold=None):
+        if window not in ('fixed', 'adaptive'):
+            raise ValueError(f"Unsupported sorted_neighborhood window: {window}")
+        keys = pd.Series(keys).reset_index(drop=True)
+        # numeric keys sort numerically. everything else (and any adaptive
+        # window, which needs string prefixes) sorts as strings.
+        self._numeric = pd.api.types.is_numeric_dtype(keys) and window == 'fixed'
+        present = keys.notna().to_numpy()
+        values = keys[present].to_numpy(dtype=float if self._numeric else object)
+        if not self._numeric:
+            values = values.astype(str).astype(object)
+        order = np.argsort(values, kind='stable')
+        self.sorted_keys = values[order]
+        self.permutation = np.concatenate(
+            (np.flatnonzero(present)[order], np.flatnonzero(~present))
+        ).astype(np.int64)
+
+        self.threshold = threshold
+        self.window = window
+        self.prefix_length = prefix_length
+        self.min_threshold = max(1, threshold // 2) if min_threshold is None else min_threshold
+        self.max_threshold = 4 * threshold if max_threshold is None else max_threshold
+
+    def __len__(self):
+        return len(self.permutation)
+
+    def _coerce(self, key):
+        if self._numeric:
+            return float(key)
+        return str(key)
+
+    def lookup(self, key) -> np.ndarray:
+        if pd.isna(key):
+            # missing keys insert after every present key
+            pos = len(self.sorted_keys)
+        else:
+            key = self._coerce(key)
+            pos = int(np.searchsorted(self.sorted_keys, key))
+        if self.window == 'fixed' or pd.isna(key):
+            start, end = max(0, pos - self.threshold), pos + self.threshold
+        else:
+            prefix = key[:self.prefix_length]
+            run_start = int(np.searchsorted(self.sorted_keys, prefix))
+            run_end = int(np.searchsorted(self.sorted_keys, prefix + '\U0010ffff'))
+            start = max(run_start, pos - self.max_threshold)
+            end = min(run_end, pos + self.max_threshold)
+            start = max(0, min(start, pos - self.min_threshold))
+            end = max(end, pos + self.min_threshold)
+        return self.permutation[start:end]
+
+
+# mersenne prime for the universal hash family h(x) = (a*x + b) mod p.
+# a and b stay below 2**31 and the shingle hashes below 2**32, so a*x + b
+# never overflows uint64.
+_MERSENNE_PRIME = np.uint64((1 << 61) - 1)
+_TOKEN_PATTERN = re.compile(r"\w+")
+
+
+class MinHashLSHIndex:
+    """
+    MinHash locality-sensitive hashing index for long free-text fields
+    (product names, descriptions) where an exact or prefix key misses
+    matches that differ early in the string.
+
+    Each key is turned into a set of shingles, words ('shingle': 'token')
+    or character n-grams ('shingle': 'char', 'shingle_size' characters),
+    and summarised by a num_perm MinHash signature. The signature is cut
+    into `bands` bands of `rows` values and every band is hashed to one
+    uint64 bucket id. Two rows are candidates when they share a bucket in
+    any band, which happens with probability 1 - (1 - J**rows)**bands for
+    Jaccard similarity J.
+
+    Bucket tables are stored per band as sorted bucket ids plus the row
+    positions in that order, so a lookup is bands binary searches and the
+    union of the colliding slices rather than a column scan.
+
+    With index_path set, the signature matrix and bucket tables are saved
+    to that .npz file and reloaded on the next construction over the same
+    keys and parameters instead of being rebuilt.
+    """
+    def __init__(self, keys, num_perm=128, bands=32, rows=4, shingle='token',
+                 shingle_size=3, seed=1, index_path=None):
+        if shingle not in ('token', 'char'):
+            raise ValueError(f"Unsupported minhash_lsh shingle: {shingle}")
+        if bands * rows > num_perm:
+            raise ValueError(
+                f"minhash_lsh needs bands * rows <= num_perm, got {bands} * {rows} > {num_perm}"
+            )
+        self.num_perm = num_perm
+        self.bands = bands
+        self.rows = rows
+        self.shingle = shingle
+        self.shingle_size = shingle_size
+        rng = np.random.default_rng(seed)
+        self._a = rng.integers(1, 1 << 31, size=num_perm, dtype=np.uint64)
+        self._b = rng.integers(0, 1 << 31, size=num_perm, dtype=np.uint64)
+        # odd multipliers folding a band's `rows` values into one bucket id
+        self._band_mix = rng.integers(1, 1 << 63, size=rows, dtype=np.uint64) | np.uint64(1)
+
+        keys = pd.Series(keys).reset_index(drop=True)
+        fingerprint = self._fingerprint(keys, seed)
+        if index_path and self._load(index_path, fingerprint):
+            return
+        shingle_sets = [self._shingles(k) for k in keys]
+        self._empty = np.array([not len(s) for s in shingle_sets], dtype=bool)
+        self.signatures = self._signatures(shingle_sets)
+        self._build_buckets()
+        if index_path:
+            self._save(index_path, fingerprint)
+
+    def __len__(self):
+        return len(self.signatures)
+
+    def _fingerprint(self, keys, seed) -> str:
+        h = hashlib.sha256()
+        params = (self.num_perm, self.bands, self.rows, self.shingle, self.shingle_size, seed)
+        h.update(repr(params).encode())
+        h.update(pd.util.hash_pandas_object(keys.astype(str), index=False).to_numpy().tobytes())
+        return h.hexdigest()
+
+    def _shingles(self, key) -> np.ndarray:
+        if key is None or (not isinstance(key, str) and pd.isna(key)):
+            return np.array([], dtype=np.uint64)
+        tokens = _TOKEN_PATTERN.findall(str(key).lower())
+        if self.shingle == 'token':
+            shingles = set(tokens)
+        else:
+            text = ' '.join(tokens)
+            k = self.shingle_size
+            shingles = {text[i:i + k] for i in range(max(1, len(text) - k + 1))} if text else set()
+        # crc32 rather than hash() so signatures are stable across processes
+        return np.fromiter(
+            (zlib.crc32(s.encode()) for s in shingles), dtype=np.uint64, count=len(shingles)
+        )
+
+    def _signatures(self, shingle_sets) -> np.ndarray:
+        """
+        MinHash signature per shingle set, shape (n, num_perm). Empty sets
+        get an all-max signature and are left out of the bucket tables.
+        """
+        n = len(shingle_sets)
+        signatures = np.full((n, self.num_perm), np.iinfo(np.uint64).max, dtype=np.uint64)
+        lengths = np.array([len(s) for s in shingle_sets], dtype=np.int64)
+        # process rows in chunks so the (chunk shingles, num_perm) hash
+        # matrix stays bounded
+        budget = 1 << 16
+        start = 0
+        while start < n:
+            end, total = start, 0
+            while end < n and (end == start or total + lengths[end] <= budget):
+                total += lengths[end]
+                end += 1
+            chunk = [s for s in shingle_sets[start:end] if len(s)]
+            if chunk:
+                flat = np.concatenate(chunk)
+                hashed = (flat[:, None] * self._a + self._b) % _MERSENNE_PRIME
+                nonempty = np.flatnonzero(lengths[start:end]) + start
+                offsets = np.concatenate(([0], np.cumsum(lengths[nonempty])[:-1]))
+                signatures[nonempty] = np.minimum.reduceat(hashed, offsets, axis=0)
+            start = end
+        return signatures
+
+    def _band_ids(self, signatures) -> np.ndarray:
+        # (n, bands) bucket ids; uint64 arithmetic wraps, which is fine for hashing
+        used = signatures[:, :self.bands * self.rows].reshape(len(signatures), self.bands, self.rows)
+        with np.errstate(over='ignore'):
+            return (used * self._band_mix).sum(axis=2, dtype=np.uint64)
+
+    def _build_buckets(self):
+        band_ids = self._band_ids(self.signatures)
+        present = np.flatnonzero(~self._empty)
+        self.bucket_ids = np.empty((self.bands, len(present)), dtype=np.uint64)
+        self.bucket_positions = np.empty((self.bands, len(present)), dtype=np.int64)
+        for band in range(self.bands):
+            ids = band_ids[present, band]
+            order = np.argsort(ids, kind='stable')
+            self.bucket_ids[band] = ids[order]
+            self.bucket_positions[band] = present[order]
+
+    def _save(self, index_path, fingerprint):
+        directory = os.path.dirname(index_path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        # np.savez appends .npz to names without it, so write through a handle
+        tmp_path = index_path + '.tmp'
+        with open(tmp_path, 'wb') as f:
+            np.savez(
+                f,
+                fingerprint=np.array(fingerprint),
+                signatures=self.signatures,
+                empty=self._empty,
+                bucket_ids=self.bucket_ids,
+                bucket_positions=self.bucket_positions,
+            )
+        os.replace(tmp_path, index_path)
+
+    def _load(self, index_path, fingerprint) -> bool:
+        if not os.path.isfile(index_path):
+            return False
+        with np.load(index_path) as stored:
+            if str(stored['fingerprint']) != fingerprint:
+                return False
+            self.signatures = stored['signatures']
+            self._empty = stored['empty']
+            self.bucket_ids = stored['bucket_ids']
+            self.bucket_positions = stored['bucket_positions']
+        return True
+
+    def lookup(self, key) -> np.ndarray:
+        shingles = self._shingles(key)
+        if not len(shingles):
+            return _EMPTY
+        band_ids = self._band_ids(self._signatures([shingles]))[0]
+        found = []
+        for band, bucket in enumerate(band_ids):
+            ids = self.bucket_ids[band]
+            lo = np.searchsorted(ids, bucket, side='left')
+            hi = np.searchsorted(ids, bucket, side='right')
+            if hi > lo:
+                found.append(self.bucket_positions[band, lo:hi])
+        if not found:
+            return _EMPTY
+        return np.unique(np.concatenate(found))
+
+
+# joins the columns of a composite blocking key
+_KEY_SEPARATOR = '\x1f'
+
+
+def build_index(config, keys):
+    """Index for one blocking config over its key column, or None for 'full'."""
+    method = config['method']
+    if method in ('prefix', 'block'):
+        return KeyIndex(keys)
+    if method == 'sorted_neighborhood':
+        return SortedNeighborhoodIndex(
+            keys,
+            config['threshold'],
+            window=config.get('window', 'fixed'),
+            prefix_length=config.get('prefix_length', 2),
+            min_threshold=config.get('min_threshold'),
+            max_threshold=config.get('max_threshold'),
+        )
+    if method == 'minhash_lsh':
+        return MinHashLSHIndex(
+            keys,
+            num_perm=config.get('num_perm', 128),
+            bands=config.get('bands', 32),
+            rows=config.get('rows', 4),
+            shingle=config.get('shingle', 'token'),
+            shingle_size=config.get('shingle_size', 3),
+            seed=config.get('seed', 1),
+            index_path=config.get('index_path'),
+        )
+    if method == 'full':
+        return None
+    raise ValueError(f"Unsupported blocking method: {method}")
+
+
+def key_columns(name, config) -> list:
+    """
+    Columns a blocking pass keys on. 'field' is set by the models'
+    preprocess (e.g. to the prefix column). A composite pass lists its
+    source columns under 'fields'. Otherwise the pass name is the column.
+    """
+    columns = config.get('field', config.get('fields', name))
+    return list(columns) if isinstance(columns, (list, tuple)) else [columns]
+
+
+class BlockingPass:
+    """One entry of a blocking_config: its key columns and prebuilt index."""
+    def __init__(self, name, config, data: pd.DataFrame):
+        self.name = name
+        self.method = config['method']
+        self.columns = key_columns(name, config)
+        self.index = build_index(config, self.frame_keys(data))
+
+    def frame_keys(self, data: pd.DataFrame) -> pd.Series:
+        if len(self.columns) == 1:
+            return data[self.columns[0]]
+        # composite key: columns joined into one string, missing if any
+        # component is missing
+        parts = data[self.columns]
+        keys = parts[self.columns[0]].map(str).astype(object)
+        for column in self.columns[1:]:
+            keys = keys + _KEY_SEPARATOR + parts[column].map(str).astype(object)
+        return keys.where(parts.notna().all(axis=1))
+
+    def record_key(self, record: pd.Series):
+        if len(self.columns) == 1:
+            return record[self.columns[0]]
+        values = [record[c] for c in self.columns]
+        if any(pd.isna(v) for v in values):
+            return None
+        return _KEY_SEPARATOR.join(str(v) for v in values)
+
+
+class Blocker:
+    """
+    Multi-pass blocking. Every entry in blocking_config is a pass with its
+    own index. A record's candidates are the union of every pass's
+    candidates, deduplicated as integer position arrays. No passes (or a
+    'full' pass) means every row is a candidate.
+
+    stats keeps per-pass query and candidate counts so pass configs can be
+    tuned for throughput. report() turns them into a DataFrame.
+    """
+    def __init__(self, blocking_config, data: pd.DataFrame):
+        self.n_rows = len(data)
+        self.passes = [
+            BlockingPass(name, config, data) for name, config in (blocking_config or {}).items()
+        ]
+        self.reset_stats()
+
+    def reset_stats(self):
+        self.stats = {p.name: [0, 0] for p in self.passes}
+        self.stats['union'] = [0, 0]
+
+    def merge_stats(self, stats):
+        for name, (queries, candidates) in stats.items():
+            current = self.stats.setdefault(name, [0, 0])
+            current[0] += queries
+            current[1] += candidates
+
+    def candidates(self, record: pd.Series) -> np.ndarray:
+        """Row positions of the candidates for a preprocessed record."""
+        everything = np.arange(self.n_rows, dtype=np.int64)
+        found = []
+        for blocking_pass in self.passes:
+            if blocking_pass.index is None:
+                positions = everything
+            else:
+                positions = blocking_pass.index.lookup(blocking_pass.record_key(record))
+            self.stats[blocking_pass.name][0] += 1
+            self.stats[blocking_pass.name][1] += len(positions)
+            found.append(positions)
+
+        if not found:
+            result = everything
+        elif len(found) == 1:
+            result = found[0]
+        else:
+            result = np.unique(np.concatenate(found))
+        self.stats['union'][0] += 1
+        self.stats['union'][1] += len(result)
+        return result
+
+    def report(self) -> pd.DataFrame:
+        methods = {p.name: p.method for p in self.passes}
+        methods['union'] = ''
+        rows = []
+        for name, (queries, candidates) in self.stats.items():
+            rows.append({
+                'pass': name,
+                'method': methods.get(name, ''),
+                'queries': queries,
+                'candidates': candidates,
+                'mean_candidates': candidates / queries if queries else 0.0,
+            })
+        return pd.DataFrame(rows)
@@ -23,11 +23,14 @@ def generate_html_table(dataset_results):
 
 def _build_model(
     model_name, df, ignored_columns, field_config, blocking_config,
-    test_size=0.0, random_state=0,
+    test_size=0.0, random_state=0, n_jobs=None, artifacts=None, embedding_cache=None,
 ):
     # each model gets its own copy. ExactMatchModel mutates self.df,
     # FlexMatchModel rewrites columns.
     df = df.copy()
+    # seed-independent preprocessing, blocking indexes and vectorizers
+    # shared across seeds. ExactMatchModel has nothing worth sharing.
+    shared = {"artifacts": artifacts}
     common = {
         "ignored_columns": ignored_columns,
         "test_size": test_size,
@@ -38,16 +41,26 @@ def _build_model(
         return ExactMatchModel(df, **common)
     if model_name == "flex":
         from matchify.models.flex_match_model import FlexMatchModel
-        return FlexMatchModel(df, field_config=field_config, blocking_config=blocking_config, **common)
+        return FlexMatchModel(
+            df, field_config=field_config, blocking_config=blocking_config, n_jobs=n_jobs, **common, **shared,
+        )
     if model_name == "mlp":
         from matchify.models.mlp_match_model import MLPMatchModel
-        return MLPMatchModel(df, field_config=field_config, blocking_config=blocking_config, **common)
+        return MLPMatchModel(
+            df, field_config=field_config, blocking_config=blocking_config, n_jobs=n_jobs, **common, **shared,
+        )
     if model_name == "bert":
         from matchify.models.bert_match_model import BertMatchModel
-        return BertMatchModel(df, field_config=field_config, blocking_config=blocking_config, **common)
+        return BertMatchModel(
+            df, field_config=field_config, blocking_config=blocking_config,
+            embedding_cache=embedding_cache, **common, **shared,
+        )
     if model_name == "siamese":
         from matchify.models.siamese_match_model import SiameseMatchModel
-        return SiameseMatchModel(df, field_config=field_config, blocking_config=blocking_config, **common)
+        return SiameseMatchModel(
+            df, field_config=field_config, blocking_config=blocking_config,
+            embedding_cache=embedding_cache, **common, **shared,
+        )
     raise click.BadParameter(
         f"Unknown model '{model_name}'. Pick from: exact, flex, mlp, bert, siamese."
     )
@@ -56,6 +69,20 @@ def _build_model(
 ALL_MODELS = ("exact", "flex", "mlp", "bert", "siamese")
 
 
+def _echo_blocking_stats(model):
+    # per-pass candidate counts from the last seed, so blocking passes can
+    # be tuned against how many candidates each one contributes
+    blocker = getattr(model, "blocker", None)
+    if blocker is None or not blocker.passes:
+        return
+    for row in blocker.report().to_dict("records"):
+        if row["queries"]:
+            click.echo(
+                f"    blocking {row['pass']} ({row['method'] or 'all passes'}): "
+                f"{row['mean_candidates']:.1f} candidates/query"
+            )
+
+
 def _available_models(requested):
     """Drop bert/siamese if sentence_transformers isn't installed."""
     import importlib.util
@@ -126,9 +153,32 @@ def _available_models(requested):
          "seed gets its own train run. MRR and F1 reported as mean +/- std. "
          "Deterministic models (Exact, Flex, BERT) ignore this flag.",
 )
+@click.option(
+    "--n-jobs", default=1, type=int,
+    help="Worker processes for evaluation (MRR and pair scoring) and for "
+         "normalizing large columns. -1 uses every core.",
+)
+@click.option(
+    "--cache-dir", default=None, type=str,
+    help="Cache eval rankings on disk here, keyed by dataset contents, "
+         "configs, model hyperparameters and seed. Reruns with nothing "
+         "changed skip scoring.",
+)
+@click.option(
+    "--embedding-cache-dir", default=None, type=str,
+    help="Cache BERT/Siamese record embeddings on disk here, keyed by "
+         "encoder (or fine-tuned checkpoint) and record text. Reruns only "
+         "encode records they haven't seen.",
+)
+@click.option(
+    "--embedding-cache-size", default=None, type=int,
+    help="Max cached embeddings per encoder. Least recently used are "
+         "evicted. Unbounded by default.",
+)
 def model_comparisons(
     datasets, models, run_all, limit, output_path, threshold, confusion,
-    pr_curves_dir, test_size, random_state, seeds,
+    pr_curves_dir, test_size, random_state, seeds, n_jobs, cache_dir,
+    embedding_cache_dir, embedding_cache_size,
 ):
     """Run the configured models on the configured datasets, write HTML report.
 
@@ -148,6 +198,16 @@ def model_comparisons(
     if not models:
         raise click.ClickException("No runnable models. Install [deep] or pick from: exact, flex, mlp.")
 
+    score_cache = None
+    if cache_dir:
+        from matchify.utils.score_cache import ScoreCache
+        score_cache = ScoreCache(cache_dir)
+
+    embedding_cache = None
+    if embedding_cache_dir:
+        from matchify.utils.embedding_cache import EmbeddingCache
+        embedding_cache = EmbeddingCache(embedding_cache_dir, max_entries=embedding_cache_size)
+
     dataset_results = []
     for dataset_key in datasets:
         if dataset_key not in DATASETS:
@@ -165,8 +225,12 @@ def model_comparisons(
         record = df[df["id"] == cfg["lookup_id"]].iloc[0]
         record = record[[x for x in record.index if x not in ignored_columns]]
 
+        from matchify.artifacts import DatasetArtifacts
         from matchify.evaluation import aggregate_metric, aggregate_pr_curves, is_stochastic
 
+        # one bundle per dataset, so seeds only redo sampling and fitting
+        artifacts = DatasetArtifacts(dataset_key)
+
         model_results = []
         pr_curve_results = []
         for model_name in models:
@@ -182,7 +246,8 @@ def model_comparisons(
                 seed = random_state + seed_idx
                 model = _build_model(
                     model_name, df, ignored_columns, cfg["field_config"], cfg["blocking_config"],
-                    test_size=test_size, random_state=seed,
+                    test_size=test_size, random_state=seed, n_jobs=n_jobs, artifacts=artifacts,
+                    embedding_cache=embedding_cache,
                 )
                 if hasattr(model, "train"):
                     model.train()
@@ -191,17 +256,27 @@ def model_comparisons(
                         record, only_matches=False, return_full_record=True
                     ).head(10)
                     class_label = type(model).__name__
-                mrr_runs.append(model.mrr())
-                if pr_curves_dir or confusion:
-                    # pr_curve caches the scored pairs internally, so
-                    # confusion_matrix at the user-specified threshold
-                    # reuses them without re-running predict.
-                    pr_curve_runs.append(model.pr_curve())
+                if pr_curves_dir or confusion or score_cache is not None:
+                    # one predict sweep gives MRR, the scored pairs and the
+                    # confusion stats. pr_curve reuses the cached pairs.
+                    # only evaluate reads the score cache, so MRR-only runs
+                    # with --cache-dir come through here too.
+                    evaluation = model.evaluate(
+                        threshold, n_jobs=n_jobs, cache=score_cache, cache_name=dataset_key,
+                    )
+                    if score_cache is not None:
+                        click.echo(f"    seed {seed}: score cache {score_cache.last_status}")
+                    mrr_runs.append(evaluation['mrr'])
+                    if pr_curves_dir or confusion:
+                        pr_curve_runs.append(model.pr_curve())
                     if confusion:
-                        confusion_runs.append(model.confusion_matrix(threshold))
+                        confusion_runs.append(evaluation['confusion'])
+                else:
+                    mrr_runs.append(model.mrr(n_jobs=n_jobs))
 
             mrr_mean, mrr_std = aggregate_metric(mrr_runs)
             click.echo(f"    MRR: {mrr_mean:.4f} ± {mrr_std:.4f}" if n_runs > 1 else f"    MRR: {mrr_mean:.4f}")
+            _echo_blocking_stats(model)
 
             confusion_stats = None
             pr_curve_df = None
@@ -242,6 +317,8 @@ def model_comparisons(
                 "confusion": confusion_stats,
             })
 
+        click.echo(f"  shared artifacts: {artifacts.summary()}")
+
         if pr_curves_dir and pr_curve_results:
             from matchify.plotting import save_pr_curve
             png_path = os.path.join(pr_curves_dir, f"pr_{dataset_key}.png")
@@ -258,6 +335,10 @@ def model_comparisons(
     with open(output_path, "w") as f:
         f.write(html_output)
 
+    if score_cache is not None:
+        click.echo(f"\nScore cache ({cache_dir}): {score_cache.summary()}")
+    if embedding_cache is not None:
+        click.echo(f"Embedding cache ({embedding_cache_dir}): {embedding_cache.summary()}")
     click.echo(f"\nGenerated {output_path}")
 
 
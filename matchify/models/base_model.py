@@ -1,32 +1,81 @@
 import abc
+import copy
+import hashlib
+import json
+import multiprocessing
+import os
 import random
+from concurrent.futures import ProcessPoolExecutor, as_completed
 
-import nameparser
+import numpy as np
 import pandas as pd
-import phonenumbers
-import usaddress
-from dateutil import parser as date_parser
 from tqdm import tqdm
 
+from matchify.blocking import Blocker
+from matchify.utils import normalizers
+
+# fitted model shipped to each evaluation worker once, by the pool initializer
+_EVAL_WORKER_MODEL = None
+
+
+def _init_eval_worker(model):
+    global _EVAL_WORKER_MODEL
+    _EVAL_WORKER_MODEL = model
+
+
+def _predict_eval_batch(labels, kwargs):
+    model = _EVAL_WORKER_MODEL
+    blocker = getattr(model, 'blocker', None)
+    if blocker is not None:
+        blocker.reset_stats()
+    frame = model.predict_many(model.df.loc[labels], **kwargs)
+    # blocking counts live in the worker's copy of the model, so they are
+    # shipped back with the batch and merged into the parent's blocker
+    return frame, (blocker.stats if blocker is not None else None)
+
+
+def _resolve_n_jobs(n_jobs) -> int:
+    # sklearn convention: None -> 1, -1 -> every core, -2 -> all but one
+    if n_jobs is None:
+        return 1
+    if n_jobs < 0:
+        return max(1, (os.cpu_count() or 1) + 1 + n_jobs)
+    return max(1, n_jobs)
+
 
 class ERBaseModel(abc.ABC):
+    # minimum score a candidate needs to survive only_matches=True.
+    # None keeps every candidate.
+    match_threshold = None
+    # eval rows handed to predict_many per call by mrr/_score_all_pairs
+    eval_batch_size = 256
+    # start method of the n_jobs > 1 eval pool ('fork', 'spawn',
+    # 'forkserver'). None is the platform default.
+    eval_start_method = None
+    # bookkeeping columns models add to self.df
+    _INTERNAL_COLUMNS = ('matchify_hash', 'predicted_group_id', 'score')
+
     def __init__(
         self,
         df: pd.DataFrame,
         ignored_columns=None,
         test_size: float = 0.0,
         random_state: int = 0,
+        artifacts=None,
         **kwargs,
     ):
         self.df = df
         self.ignored_columns = list(ignored_columns or [])
-        self.ignored_columns += ['matchify_hash', 'predicted_group_id', 'score']
+        self.ignored_columns += list(self._INTERNAL_COLUMNS)
         self.is_clustered = False
         self.model = None
         self.kwargs = kwargs
         self.test_size = test_size
         self.random_state = random_state
         self._train_idx, self._test_idx = self._compute_split()
+        # optional matchify.artifacts.DatasetArtifacts shared by every model
+        # and seed built on the same dataset, see _shared
+        self.artifacts = artifacts
 
     def _compute_split(self):
         # split groups (not rows) so supervised models never see test pairs.
@@ -57,32 +106,23 @@ class ERBaseModel(abc.ABC):
     def preprocess(self, df: pd.DataFrame, ignored_columns=None) -> pd.DataFrame:
         pass
 
+    # the normalizers are memoized process-wide, see matchify.utils.normalizers
     def _normalize_name(self, name: str) -> str:
-        # .lower() goes on the string, not on the HumanName instance
-        return str(nameparser.HumanName(name)).lower()
+        return normalizers.normalize('name', name)
 
     def _normalize_phone(self, phone: str) -> str:
-        # phonenumbers.parse needs a region for non-international numbers.
-        # default to US so "(555) 123-4567" works. fall back to digits.
-        try:
-            parsed_phone = phonenumbers.parse(phone, "US")
-            return phonenumbers.format_number(parsed_phone, phonenumbers.PhoneNumberFormat.E164)
-        except phonenumbers.NumberParseException:
-            digits = "".join(ch for ch in str(phone) if ch.isdigit())
-            return digits
+        return normalizers.normalize('phone', phone)
 
     def _normalize_address(self, address: str) -> str:
-        try:
-            parsed_address, _ = usaddress.tag(address)
-            return " ".join(parsed_address.values()).lower()
-        except Exception:
-            return ""
+        return normalizers.normalize('address', address)
 
     def _normalize_date(self, date: str) -> str:
-        try:
-            return date_parser.parse(date).strftime("%Y-%m-%d")
-        except (ValueError, TypeError):
-            return ""
+        return normalizers.normalize('date', date)
+
+    def _normalize_column(self, field_type: str, column: pd.Series) -> pd.Series:
+        # models that take n_jobs shard large columns across a process pool
+        n_jobs = _resolve_n_jobs(getattr(self, 'n_jobs', None))
+        return normalizers.normalize_column(field_type, column, n_jobs=n_jobs)
 
     @abc.abstractmethod
     def train(self, *args, **kwargs):
@@ -92,6 +132,92 @@ class ERBaseModel(abc.ABC):
     def predict(self, record: pd.Series, **kwargs) -> pd.DataFrame:
         pass
 
+    @abc.abstractmethod
+    def predict_many(self, records: pd.DataFrame, top_k=None, **kwargs) -> pd.DataFrame:
+        """Rank candidates for every row of records in one batch.
+
+        Returns a long frame with columns query_id (index label in
+        records), candidate_id (index label in self.df), score and rank
+        (1-based within each query, best first). top_k keeps the k best
+        candidates per query. only_matches=True applies match_threshold.
+        """
+        pass
+
+    @staticmethod
+    def _ranking_frame(query_ids, candidates, scores, top_k=None, min_score=None) -> pd.DataFrame:
+        # candidates/scores hold one array per query. sort once over the
+        # concatenation: query order first, then score descending. lexsort
+        # is stable so ties keep candidate order.
+        sizes = np.fromiter((len(c) for c in candidates), dtype=np.int64, count=len(candidates))
+        if not sizes.sum():
+            return pd.DataFrame({
+                'query_id': pd.Series([], dtype=object),
+                'candidate_id': pd.Series([], dtype=object),
+                'score': pd.Series([], dtype=float),
+                'rank': pd.Series([], dtype=np.int64),
+            })
+        query_pos = np.repeat(np.arange(len(sizes)), sizes)
+        cand = np.concatenate([np.asarray(c) for c in candidates])
+        score = np.concatenate([np.asarray(s, dtype=float) for s in scores])
+        if min_score is not None:
+            keep = score >= min_score
+            query_pos, cand, score = query_pos[keep], cand[keep], score[keep]
+
+        order = np.lexsort((-score, query_pos))
+        query_pos, cand, score = query_pos[order], cand[order], score[order]
+        starts = np.r_[0, np.flatnonzero(np.diff(query_pos)) + 1]
+        group_len = np.diff(np.r_[starts, len(query_pos)])
+        rank = np.arange(len(query_pos)) - np.repeat(starts, group_len) + 1
+        if top_k is not None:
+            keep = rank <= top_k
+            query_pos, cand, score, rank = query_pos[keep], cand[keep], score[keep], rank[keep]
+
+        return pd.DataFrame({
+            'query_id': np.asarray(query_ids)[query_pos],
+            'candidate_id': cand,
+            'score': score,
+            'rank': rank,
+        })
+
+    def _predict_eval_rows(self, desc, n_jobs=None, **kwargs) -> pd.DataFrame:
+        # predict_many over the eval partition in eval_batch_size chunks so
+        # the progress bar moves and peak memory stays bounded. with
+        # n_jobs > 1 the chunks are sharded across a process pool, each
+        # worker gets the fitted model once, and results are reassembled
+        # in chunk order so the output doesn't depend on scheduling.
+        eval_idx = self._eval_idx
+        batches = [
+            eval_idx[start:start + self.eval_batch_size]
+            for start in range(0, len(eval_idx), self.eval_batch_size)
+        ]
+        n_workers = min(_resolve_n_jobs(n_jobs), len(batches))
+        progress_bar = tqdm(total=len(eval_idx), ncols=100, desc=desc, unit=" rows", unit_scale=True)
+        frames = [None] * len(batches)
+        if n_workers <= 1:
+            for i, batch in enumerate(batches):
+                frames[i] = self.predict_many(self.df.loc[batch], **kwargs)
+                progress_bar.update(len(batch))
+        else:
+            mp_context = multiprocessing.get_context(self.eval_start_method) if self.eval_start_method else None
+            with ProcessPoolExecutor(
+                max_workers=n_workers, mp_context=mp_context,
+                initializer=_init_eval_worker, initargs=(self,),
+            ) as pool:
+                futures = {
+                    pool.submit(_predict_eval_batch, batch, kwargs): i
+                    for i, batch in enumerate(batches)
+                }
+                for future in as_completed(futures):
+                    i = futures[future]
+                    frames[i], stats = future.result()
+                    if stats is not None:
+                        self.blocker.merge_stats(stats)
+                    progress_bar.update(len(batches[i]))
+        progress_bar.close()
+        if not frames:
+            return self._ranking_frame([], [], [])
+        return pd.concat(frames, ignore_index=True)
+
     def fit_predict(self, record: pd.Series, *args, **kwargs) -> pd.DataFrame:
         self.train(*args, **kwargs)
         return self.predict(record)
@@ -102,63 +228,79 @@ class ERBaseModel(abc.ABC):
         else:
             return (score - min_score) / (max_score - min_score)
 
+    def _group_index(self):
+        # id -> group_id, group_id -> row positions and per-row group codes
+        # (NaN group = -1), built once per self.df and reused by every eval call.
+        # rebuilt only when self.df is swapped out (the pipeline does this).
+        if getattr(self, '_group_index_df', None) is self.df:
+            return self._group_index_cache
+        if 'group_id' not in self.df.columns:
+            raise Exception('group index requires group_id column')
+
+        ids = self.df['id'].to_numpy()
+        groups = self.df['group_id']
+        codes, _ = pd.factorize(groups)
+        positions = self.df.groupby('group_id').indices
+        self._group_index_cache = {
+            'id_to_group': dict(zip(ids, groups.to_numpy())),
+            'group_positions': positions,
+            'codes': codes,
+        }
+        self._group_index_df = self.df
+        return self._group_index_cache
+
     def _get_actual_matches(self, id) -> pd.DataFrame:
         if 'group_id' not in self.df.columns:
             raise Exception('_get_actual_matches requires group_id column')
-        df_matching_id = self.df[self.df['id'] == id][:1]
-        if df_matching_id.empty:
+        index = self._group_index()
+        if id not in index['id_to_group']:
             raise Exception(f"id {id} not found in original dataframe")
-        group_id = list(df_matching_id['group_id'])[0]
-        if not group_id:
-            return []
-        matches = self.df[self.df['group_id'] == group_id]
-        return matches
-
-    def mrr(self):
+        group_id = index['id_to_group'][id]
+        if pd.isna(group_id):
+            return self.df.iloc[0:0]
+        return self.df.iloc[index['group_positions'][group_id]]
+
+    def _pair_codes(self, ranking: pd.DataFrame):
+        # drop self-pairs and look up group codes for both sides of every
+        # remaining (query, candidate) pair with positional array indexing.
+        codes = self._group_index()['codes']
+        ids = self.df['id'].to_numpy()
+        query_pos = self.df.index.get_indexer(ranking['query_id'])
+        cand_pos = self.df.index.get_indexer(ranking['candidate_id'])
+        keep = ids[query_pos] != ids[cand_pos]
+        return keep, codes[query_pos[keep]], codes[cand_pos[keep]]
+
+    def mrr(self, n_jobs=None):
         """Mean reciprocal rank over eval rows. Reciprocal rank of the first
-        true positive in each predicted candidate list, averaged."""
+        true positive in each predicted candidate list, averaged.
+
+        n_jobs > 1 spreads the eval rows over that many worker processes
+        (-1 for every core)."""
         if 'group_id' not in self.df.columns:
             raise Exception('MRR requires group_id column')
 
-        rr_list = []
-        eval_idx = self._eval_idx
-        progress_bar = tqdm(total=len(eval_idx), ncols=100, desc="Calculating MRR", unit=" rows", unit_scale=True)
-
-        for index in eval_idx:
-            row = self.df.loc[index]
-            row_id = row.id
-            row = row[[x for x in row.index if x not in self.ignored_columns]]
-
-            predicted_matches = self.predict(row, only_matches=True)
-            if predicted_matches.empty:
-                progress_bar.update(1)
-                continue
-
-            predicted_match_ids = [x for x in predicted_matches['id'] if x != row_id]
-
-            actual_match_ids = list(self._get_actual_matches(row_id)['id'])
-            if not actual_match_ids:
-                progress_bar.update(1)
-                continue
-
-            if not predicted_match_ids:
-                rr_list.append(0)
-                progress_bar.update(1)
-                continue
-
-            for idx, pred_id in enumerate(predicted_match_ids):
-                if pred_id in actual_match_ids:
-                    rr_list.append(1 / (idx + 1))
-                    break
-            else:
-                rr_list.append(0)
-
-            progress_bar.update(1)
-
-        progress_bar.close()
-        return sum(rr_list) / len(rr_list) if rr_list else 0
-
-    def _score_all_pairs(self):
+        ranking = self._predict_eval_rows("Calculating MRR", n_jobs=n_jobs, only_matches=True)
+        return self._mrr_from_ranking(ranking)
+
+    def _mrr_from_ranking(self, ranking: pd.DataFrame) -> float:
+        # rows without any candidate or without a group don't count. rows
+        # with candidates but no true match among them count as 0.
+        queries = pd.unique(ranking['query_id'])
+        query_codes = self._group_index()['codes'][self.df.index.get_indexer(queries)]
+        counted = pd.Index(queries[query_codes >= 0])
+        if not len(counted):
+            return 0
+
+        keep, query_codes, cand_codes = self._pair_codes(ranking)
+        pairs = ranking[keep]
+        # rank among non-self candidates, as if self had never been returned
+        rank = pairs.groupby('query_id', sort=False).cumcount().to_numpy() + 1
+        is_match = (query_codes >= 0) & (query_codes == cand_codes)
+        first_hit = pd.Series(rank[is_match]).groupby(pairs['query_id'].to_numpy()[is_match]).min()
+        rr = (1.0 / first_hit).reindex(counted, fill_value=0.0)
+        return float(rr.mean())
+
+    def _score_all_pairs(self, n_jobs=None):
         # walk eval rows once, collect (score, is_match) per candidate pair.
         # shared between confusion_matrix and pr_curve. cache the result
         # so repeated callers (e.g., curve + confusion at one threshold)
@@ -168,65 +310,169 @@ class ERBaseModel(abc.ABC):
         if 'group_id' not in self.df.columns:
             raise Exception('scoring requires group_id column')
 
-        group_lookup = self.df.set_index('id')['group_id'].to_dict()
-        scores = []
-        labels = []
+        ranking = self._predict_eval_rows("Scoring pairs", n_jobs=n_jobs, only_matches=False)
+        self._pair_score_cache = self._pairs_from_ranking(ranking)
+        return self._pair_score_cache
 
-        eval_idx = self._eval_idx
-        progress_bar = tqdm(total=len(eval_idx), ncols=100, desc="Scoring pairs", unit=" rows")
-        for index in eval_idx:
-            row = self.df.loc[index]
-            row_id = row.id
-            row_group = group_lookup.get(row_id)
-            row_features = row[[x for x in row.index if x not in self.ignored_columns]]
-            preds = self.predict(row_features, only_matches=False, return_full_record=True)
-            for _, pred in preds.iterrows():
-                pred_id = pred.get('id')
-                if pred_id == row_id:
-                    continue
-                pred_group = group_lookup.get(pred_id)
-                actual_match = (
-                    row_group is not None
-                    and pred_group is not None
-                    and not pd.isna(row_group)
-                    and not pd.isna(pred_group)
-                    and row_group == pred_group
-                )
-                scores.append(float(pred.get('score') or 0.0))
-                labels.append(bool(actual_match))
-            progress_bar.update(1)
-        progress_bar.close()
-        self._pair_score_cache = (scores, labels)
+    def _pairs_from_ranking(self, ranking: pd.DataFrame):
+        keep, query_codes, cand_codes = self._pair_codes(ranking)
+        labels = (query_codes >= 0) & (query_codes == cand_codes)
+        scores = ranking['score'].to_numpy(dtype=float)[keep]
         return scores, labels
 
-    @staticmethod
-    def _stats_at_threshold(scores, labels, threshold):
-        tp = fp = tn = fn = 0
-        for s, y in zip(scores, labels):
-            predicted_match = s >= threshold
-            if predicted_match and y:
-                tp += 1
-            elif predicted_match and not y:
-                fp += 1
-            elif not predicted_match and y:
-                fn += 1
-            else:
-                tn += 1
-        precision = tp / (tp + fp) if (tp + fp) else 0.0
-        recall = tp / (tp + fn) if (tp + fn) else 0.0
-        f1 = 2 * precision * recall / (precision + recall) if (precision + recall) else 0.0
+    def _dataset_fingerprint(self) -> str:
+        # stable across processes (no python hash()), ignores the
+        # bookkeeping columns that depend on per-process hashing.
+        columns = [c for c in self.df.columns if c not in self._INTERNAL_COLUMNS]
+        hashed = pd.util.hash_pandas_object(self.df[columns], index=True)
+        h = hashlib.sha256(hashed.to_numpy().tobytes())
+        h.update(repr(columns).encode())
+        return h.hexdigest()
+
+    def _shared(self, name, builder):
+        """
+        Seed-independent artifact (normalized frame, blocking index,
+        fitted vectorizer...) from the shared artifacts bundle, built with
+        builder() the first time. Without a bundle it's just builder().
+        """
+        if self.artifacts is None:
+            return builder()
+        return self.artifacts.get((type(self).__name__, name, self._artifact_config_key()), builder)
+
+    def _artifact_config_key(self) -> str:
+        # blocking 'field' entries are derived by preprocess, not configured
+        blocking_config = {
+            name: {k: v for k, v in config.items() if k != 'field'}
+            for name, config in (getattr(self, 'blocking_config', None) or {}).items()
+        }
+        return json.dumps({
+            'rows': len(self.df),
+            'field_config': getattr(self, 'field_config', None),
+            'blocking_config': blocking_config,
+        }, sort_keys=True, default=str)
+
+    def _prefix_columns(self, name, config) -> list:
+        # (source column, derived prefix column) for each column a prefix
+        # blocking pass keys on. composite passes list theirs under 'fields'.
+        return [(source, f"{source}_prefix_{config['threshold']}") for source in config.get('fields', [name])]
+
+    def _set_blocking_fields(self):
+        # point every prefix pass at the prefix columns preprocess derives
+        for name, config in self.blocking_config.items():
+            if config.get('method') == 'prefix':
+                columns = [prefix for _, prefix in self._prefix_columns(name, config)]
+                config['field'] = columns if 'fields' in config else columns[0]
+
+    def _build_blocker(self) -> Blocker:
+        blocker = self._shared('blocker', lambda: Blocker(self.blocking_config, self.preprocessed_data))
+        if self.artifacts is None:
+            return blocker
+        # the indexes are shared, candidate stats stay per model
+        blocker = copy.copy(blocker)
+        blocker.reset_stats()
+        return blocker
+
+    def _cache_params(self) -> dict:
+        # everything besides the data that can change the eval ranking.
+        # subclasses add their hyperparameters.
         return {
-            'threshold': threshold,
+            'model': type(self).__name__,
+            'ignored_columns': self.ignored_columns,
+            'test_size': self.test_size,
+            'random_state': self.random_state,
+            'field_config': getattr(self, 'field_config', None),
+            'blocking_config': getattr(self, 'blocking_config', None),
+        }
+
+    def evaluate(self, threshold: float = 0.5, n_jobs=None, cache=None, cache_name=None) -> dict:
+        """MRR, scored pairs and confusion stats from a single predict sweep.
+
+        mrr() ranks with only_matches=True and pr_curve() re-ranks every
+        row with only_matches=False. Here each eval row is ranked once with
+        every candidate kept. The only_matches view MRR needs is the prefix
+        of that ranking above match_threshold, so both come out of the same
+        pass. The scored pairs are cached, so a later pr_curve() or
+        confusion_matrix() call doesn't predict again.
+
+        With cache (a matchify.utils.score_cache.ScoreCache) the ranking
+        is read from / written to disk under cache_name, so reruns on
+        unchanged data and config skip predict entirely.
+
+        Returns {'mrr', 'scores', 'labels', 'confusion'}.
+        """
+        if 'group_id' not in self.df.columns:
+            raise Exception('evaluate requires group_id column')
+
+        ranking = cache.load(self, name=cache_name) if cache is not None else None
+        if ranking is None:
+            ranking = self._predict_eval_rows("Evaluating", n_jobs=n_jobs, only_matches=False)
+            if cache is not None:
+                cache.store(self, ranking, name=cache_name)
+        return self._evaluate_ranking(ranking, threshold)
+
+    def _evaluate_ranking(self, ranking: pd.DataFrame, threshold: float) -> dict:
+        matches = ranking
+        if self.match_threshold is not None:
+            matches = ranking[ranking['score'] >= self.match_threshold]
+        self._pair_score_cache = self._pairs_from_ranking(ranking)
+        scores, labels = self._pair_score_cache
+        return {
+            'mrr': self._mrr_from_ranking(matches),
+            'scores': scores,
+            'labels': labels,
+            'confusion': self.confusion_matrix(threshold),
+        }
+
+    def _sorted_pair_scores(self, n_jobs=None):
+        # sort the scored pairs once. pos_below[i] counts the positives among
+        # the i lowest scores, so any threshold's confusion counts are one
+        # binary search plus a lookup. NaN scores never clear a threshold,
+        # sort them to the bottom as -inf.
+        pairs = self._score_all_pairs(n_jobs=n_jobs)
+        if getattr(self, '_sorted_pair_source', None) is not pairs:
+            scores = np.asarray(pairs[0], dtype=float)
+            labels = np.asarray(pairs[1], dtype=bool)
+            scores = np.where(np.isnan(scores), -np.inf, scores)
+            order = np.argsort(scores, kind='stable')
+            self._sorted_pair_cache = (
+                scores[order],
+                np.concatenate(([0], np.cumsum(labels[order]))),
+            )
+            self._sorted_pair_source = pairs
+        return self._sorted_pair_cache
+
+    @staticmethod
+    def _stats_at_thresholds(sorted_scores, pos_below, thresholds) -> pd.DataFrame:
+        thresholds = np.asarray(thresholds, dtype=float)
+        n = len(sorted_scores)
+        below = np.searchsorted(sorted_scores, thresholds, side='left')
+        fn = pos_below[below]
+        tn = below - fn
+        tp = pos_below[-1] - fn
+        fp = (n - below) - tp
+        with np.errstate(divide='ignore', invalid='ignore'):
+            precision = np.where(tp + fp > 0, tp / (tp + fp), 0.0)
+            recall = np.where(tp + fn > 0, tp / (tp + fn), 0.0)
+            f1 = np.where(
+                precision + recall > 0,
+                2 * precision * recall / (precision + recall),
+                0.0,
+            )
+        return pd.DataFrame({
+            'threshold': thresholds,
             'tp': tp, 'fp': fp, 'tn': tn, 'fn': fn,
             'precision': precision, 'recall': recall, 'f1': f1,
-        }
+        })
 
-    def confusion_matrix(self, threshold: float = 0.5):
+    def confusion_matrix(self, threshold: float = 0.5, n_jobs=None):
         """TP/FP/TN/FN at one threshold, over candidate pairs from predict."""
-        scores, labels = self._score_all_pairs()
-        return self._stats_at_threshold(scores, labels, threshold)
+        sorted_scores, pos_below = self._sorted_pair_scores(n_jobs=n_jobs)
+        row = self._stats_at_thresholds(sorted_scores, pos_below, [threshold]).iloc[0]
+        stats = {k: int(row[k]) for k in ('tp', 'fp', 'tn', 'fn')}
+        stats.update({k: float(row[k]) for k in ('precision', 'recall', 'f1')})
+        return {'threshold': threshold, **stats}
 
-    def pr_curve(self, thresholds=None) -> pd.DataFrame:
+    def pr_curve(self, thresholds=None, full_resolution: bool = False, n_jobs=None) -> pd.DataFrame:
         """Precision-recall curve. confusion_matrix at many thresholds,
         predict only runs once per row.
 
@@ -234,16 +480,21 @@ class ERBaseModel(abc.ABC):
         (capped at 200 quantile-thinned points so plots stay readable
         when scores are dense). A fixed grid loses resolution when scores
         cluster, which produces degenerate curves for models whose
-        outputs are bimodal or live in a narrow band.
+        outputs are bimodal or live in a narrow band. full_resolution=True
+        skips the thinning and returns the exact curve, one row per
+        distinct score.
+
+        Scores are sorted once and every threshold is a binary search into
+        cumulative TP counts, so the curve costs O(n log n) overall.
+        n_jobs is passed through to the pair scoring pass.
         """
-        import numpy as np
-        scores, labels = self._score_all_pairs()
+        scores, _ = self._score_all_pairs(n_jobs=n_jobs)
         if thresholds is None:
             arr = np.asarray(scores, dtype=float)
             uniq = np.unique(arr) if arr.size else np.array([0.0])
-            if len(uniq) > 200:
+            if len(uniq) > 200 and not full_resolution:
                 uniq = np.unique(np.quantile(uniq, np.linspace(0.0, 1.0, 200)))
             sentinel = float(uniq[-1]) + 1e-9
             thresholds = np.unique(np.concatenate(([0.0], uniq, [sentinel])))
-        rows = [self._stats_at_threshold(scores, labels, float(t)) for t in thresholds]
-        return pd.DataFrame(rows)
+        sorted_scores, pos_below = self._sorted_pair_scores(n_jobs=n_jobs)
+        return self._stats_at_thresholds(sorted_scores, pos_below, thresholds)
@@ -1,18 +1,23 @@
 import pandas as pd
 
+from matchify.ann import build_ann_index
 from matchify.models.base_model import ERBaseModel
+from matchify.models.embedding_retrieval import EmbeddingRetrievalMixin
 
 
-class BertMatchModel(ERBaseModel):
+class BertMatchModel(EmbeddingRetrievalMixin, ERBaseModel):
     """
     Unsupervised embedding model. Encodes each record into a sentence
     vector with SentenceTransformers and ranks candidates by cosine
     similarity against the query embedding.
 
     Blocking is optional and limits candidate scoring before the
-    embedding dot-product step.
+    embedding dot-product step. With ann_config set, an ANN index over
+    the embeddings (matchify.ann) replaces blocking and predict scores
+    only the index's nearest rows.
     """
     DEFAULT_MODEL = "sentence-transformers/all-MiniLM-L6-v2"
+    match_threshold = 0.5
 
     def __init__(
         self,
@@ -24,8 +29,17 @@ class BertMatchModel(ERBaseModel):
         batch_size: int = 64,
         test_size: float = 0.0,
         random_state: int = 0,
+        ann_config=None,
+        embedding_cache=None,
+        query_batch_wait_ms=None,
+        embedding_dtype: str = 'float32',
+        rescore_k: int = None,
+        rescore_path: str = None,
+        artifacts=None,
     ):
-        super().__init__(df, ignored_columns, test_size=test_size, random_state=random_state)
+        super().__init__(
+            df, ignored_columns, test_size=test_size, random_state=random_state, artifacts=artifacts,
+        )
         try:
             from sentence_transformers import SentenceTransformer
         except ImportError as e:
@@ -36,24 +50,40 @@ class BertMatchModel(ERBaseModel):
 
         self.field_config = field_config
         self.blocking_config = blocking_config or {}
-        self.blocking_key = (
-            list(self.blocking_config.keys())[0] if self.blocking_config else None
-        )
         self.model_name = model_name
         self.batch_size = batch_size
 
-        self.encoder = SentenceTransformer(model_name)
-        self.preprocessed_data = self.preprocess(df)
-        self.embeddings = None
+        # the pretrained encoder is read-only here, so one load serves every seed
+        self.encoder = self._shared(f'encoder:{model_name}', lambda: SentenceTransformer(model_name))
+        self.preprocessed_data = self._shared('preprocessed', lambda: self.preprocess(df))
+        self._set_blocking_fields()
+        # every blocking pass is indexed once here and reused by every predict
+        self.blocker = self._build_blocker()
+        # embedding storage, ANN index and query batching, see
+        # matchify.models.embedding_retrieval
+        self._init_retrieval(
+            ann_config=ann_config,
+            embedding_cache=embedding_cache,
+            query_batch_wait_ms=query_batch_wait_ms,
+            embedding_dtype=embedding_dtype,
+            rescore_k=rescore_k,
+            rescore_path=rescore_path,
+        )
+
+    def _cache_params(self) -> dict:
+        return {
+            **super()._cache_params(),
+            'model_name': self.model_name,
+        }
 
     def preprocess(self, df) -> pd.DataFrame:
         df = df.copy()
         for field, cfg in self.blocking_config.items():
             if cfg.get('method') == 'prefix':
                 prefix_len = cfg['threshold']
-                prefix_field = f"{field}_prefix_{prefix_len}"
-                self.blocking_config[field]['field'] = prefix_field
-                df[prefix_field] = df[field].fillna('').astype(str).str[:prefix_len]
+                for source, prefix_field in self._prefix_columns(field, cfg):
+                    df[prefix_field] = df[source].fillna('').astype(str).str[:prefix_len]
+        self._set_blocking_fields()
         return df
 
     def _record_text(self, record) -> str:
@@ -67,60 +97,28 @@ class BertMatchModel(ERBaseModel):
 
     def train(self):
         """Encode every record once, cache the embedding matrix."""
-        texts = [self._record_text(row) for _, row in self.df.iterrows()]
-        self.embeddings = self.encoder.encode(
-            texts,
-            batch_size=self.batch_size,
-            convert_to_numpy=True,
-            show_progress_bar=False,
-            normalize_embeddings=True,
+        # no fitting involved, so the stored matrix and its float32
+        # rescoring copy are the same for every seed. they are shared in
+        # the embedding_dtype form, so the bundle never pins a float32
+        # matrix next to an int8/float16 one.
+        self.close()
+        exact = bool(self.rescore_k) and self.embedding_dtype != 'float32'
+        self.embeddings, self._exact_embeddings = self._shared(
+            f'embeddings:{self.model_name}:{self.embedding_dtype}:{self.rescore_path if exact else None}',
+            self._encode_and_store,
         )
+        if self.ann_config:
+            self.ann_index = self._shared(
+                f'ann:{self.model_name}:{self.embedding_dtype}:{sorted(self.ann_config.items())}',
+                lambda: build_ann_index(self.embeddings, self.ann_config),
+            )
 
-    def _apply_blocking(self, record):
-        if not self.blocking_config or self.blocking_key is None:
-            return self.preprocessed_data.index
-        cfg = self.blocking_config[self.blocking_key]
-        method = cfg['method']
-        blocking_field = cfg['field']
-        key = self.preprocess(record.to_frame().T).iloc[0][blocking_field]
-        if method in ('prefix', 'block'):
-            return self.preprocessed_data[
-                self.preprocessed_data[blocking_field] == key
-            ].index
-        if method == 'full':
-            return self.preprocessed_data.index
-        raise ValueError(f"Unsupported blocking method: {method}")
-
-    def predict(self, record: pd.Series, **kwargs) -> pd.DataFrame:
-        if self.embeddings is None:
-            raise Exception('Call train() before predict()')
-
-        only_matches = kwargs.get('only_matches')
-        return_full_record = kwargs.get('return_full_record')
+    def _encode_and_store(self):
+        embeddings = self._store_embeddings(self._encode_records())
+        return embeddings, self._exact_embeddings
 
-        text = self._record_text(record)
-        q_emb = self.encoder.encode(
-            [text], convert_to_numpy=True, show_progress_bar=False,
-            normalize_embeddings=True,
-        )[0]
-
-        candidate_indices = self._apply_blocking(record)
-        positions = [self.df.index.get_loc(i) for i in candidate_indices]
-        cand_embs = self.embeddings[positions]
-
-        # dot product is cosine since the embeddings are normalized
-        scores = cand_embs @ q_emb
-
-        results = pd.DataFrame({
-            'index': candidate_indices,
-            'score': scores,
-        }).sort_values(by='score', ascending=False).reset_index(drop=True)
-
-        records = self.df.loc[results['index']].reset_index(drop=True)
-        out = pd.concat([records, results[['score']]], axis=1)
-
-        if only_matches:
-            out = out[out['score'] >= 0.5]
-        if not return_full_record:
-            out = out[['id', 'score']]
-        return out
+    def _encode_records(self):
+        texts = [self._record_text(row) for _, row in self.df.iterrows()]
+        if self.embedding_cache is None:
+            return self._encode_texts(texts)
+        return self.embedding_cache.get_or_encode(self.model_name, texts, self._encode_texts)
@@ -0,0 +1,170 @@
+import pandas as pd
+
+from matchify import quantization
+from matchify.utils.query_batcher import QueryBatcher
+
+
+class EmbeddingRetrievalMixin:
+    """
+    Candidate retrieval and scoring shared by the embedding models
+    (BertMatchModel, SiameseMatchModel).
+
+    The model provides self.encoder, self.batch_size, self.df,
+    self.preprocessed_data, self.blocker, preprocess() and
+    _record_text(), calls _init_retrieval() from __init__ and fills
+    self.embeddings (through _store_embeddings) and optionally
+    self.ann_index in train(). predict and predict_many then rank
+    candidates by cosine similarity against the query embedding, over
+    the blocked rows or the ANN index's nearest rows.
+    """
+    def _init_retrieval(
+        self,
+        ann_config=None,
+        embedding_cache=None,
+        query_batch_wait_ms=None,
+        embedding_dtype='float32',
+        rescore_k=None,
+        rescore_path=None,
+    ):
+        self.embeddings = None
+        # optional ANN index over the embeddings, see matchify.ann. when
+        # set it replaces blocking: candidates are the index's nearest rows
+        self.ann_config = ann_config
+        self.ann_index = None
+        # optional matchify.utils.embedding_cache.EmbeddingCache, so
+        # records encoded by an earlier run aren't encoded again
+        self.embedding_cache = embedding_cache
+        # record matrix storage, see matchify.quantization. with rescore_k
+        # and a float16/int8 dtype, each query's rescore_k best compact
+        # scores are redone exactly against a float32 copy memory-mapped
+        # from rescore_path, or from a temp file released by close()
+        if embedding_dtype not in quantization.EMBEDDING_DTYPES:
+            raise ValueError(f"Unsupported embedding_dtype: {embedding_dtype}")
+        self.embedding_dtype = embedding_dtype
+        self.rescore_k = rescore_k
+        self.rescore_path = rescore_path
+        self._exact_embeddings = None
+        # with query_batch_wait_ms set, concurrent predict() calls are
+        # collected for up to that long and encoded as one batch
+        self.query_batcher = None
+        if query_batch_wait_ms is not None:
+            self.query_batcher = QueryBatcher(
+                self._encode_texts, max_batch_size=self.batch_size, wait_ms=query_batch_wait_ms,
+            )
+
+    def _cache_params(self) -> dict:
+        return {
+            **super()._cache_params(),
+            'ann_config': self.ann_config,
+            'embedding_dtype': self.embedding_dtype,
+            'rescore_k': self.rescore_k,
+        }
+
+    def _encode_texts(self, texts):
+        return self.encoder.encode(
+            texts,
+            batch_size=self.batch_size,
+            convert_to_numpy=True,
+            show_progress_bar=False,
+            normalize_embeddings=True,
+        )
+
+    def _encode_query(self, text):
+        if self.query_batcher is not None:
+            return self.query_batcher.encode(text)
+        return self._encode_texts([text])[0]
+
+    def _ann_candidates(self, q_embs, top_k=None):
+        """
+        Per-query (candidate labels, scores) from the ANN index. Pulls
+        top_k rows per query, or ann_config['k'] (default 100) without it.
+        """
+        k = top_k or self.ann_config.get('k', 100)
+        scores, positions = self.ann_index.search(q_embs, k)
+        candidates, candidate_scores = [], []
+        for row_scores, row_positions, q_emb in zip(scores, positions, q_embs):
+            found = row_positions >= 0
+            candidates.append(self.df.index[row_positions[found]].to_numpy())
+            candidate_scores.append(self._rescore(row_scores[found], row_positions[found], q_emb))
+        return candidates, candidate_scores
+
+    def _store_embeddings(self, embeddings):
+        # a retrain replaces the exact copy, so the old one is released first
+        self.close()
+        # float32 rows are already exact, there is nothing to rescore
+        if self.rescore_k and self.embedding_dtype != 'float32':
+            self._exact_embeddings = quantization.write_exact_copy(embeddings, self.rescore_path)
+        return quantization.quantize(embeddings, self.embedding_dtype)
+
+    def close(self):
+        """
+        Release the float32 copy used for rescoring. A temp copy (no
+        rescore_path) is deleted once no model or shared artifact holds it.
+        """
+        self._exact_embeddings = None
+
+    def _score(self, positions, q_emb):
+        # dot product is cosine since the embeddings are normalized
+        return self._rescore(quantization.score_rows(self.embeddings, q_emb, positions), positions, q_emb)
+
+    def _rescore(self, scores, positions, q_emb):
+        if self._exact_embeddings is None:
+            return scores
+        return quantization.rescore_top(scores, positions, q_emb, self._exact_embeddings, self.rescore_k)
+
+    def predict(self, record: pd.Series, top_k=None, **kwargs) -> pd.DataFrame:
+        if self.embeddings is None:
+            raise Exception('Call train() before predict()')
+
+        only_matches = kwargs.get('only_matches')
+        return_full_record = kwargs.get('return_full_record')
+
+        q_emb = self._encode_query(self._record_text(record))
+
+        if self.ann_index is not None:
+            candidates, scores = self._ann_candidates(q_emb[None, :], top_k)
+            candidate_indices, scores = candidates[0], scores[0]
+        else:
+            preprocessed = self.preprocess(record.to_frame().T).iloc[0]
+            positions = self.blocker.candidates(preprocessed)
+            candidate_indices = self.preprocessed_data.index[positions]
+            scores = self._score(positions, q_emb)
+
+        results = pd.DataFrame({
+            'index': candidate_indices,
+            'score': scores,
+        }).sort_values(by='score', ascending=False).reset_index(drop=True)
+        if top_k is not None:
+            results = results.head(top_k)
+
+        records = self.df.loc[results['index']].reset_index(drop=True)
+        out = pd.concat([records, results[['score']]], axis=1)
+
+        if only_matches:
+            out = out[out['score'] >= self.match_threshold]
+        if not return_full_record:
+            out = out[['id', 'score']]
+        return out
+
+    def predict_many(self, records: pd.DataFrame, top_k=None, **kwargs) -> pd.DataFrame:
+        if self.embeddings is None:
+            raise Exception('Call train() before predict()')
+
+        # one encode call for the whole batch instead of one per record.
+        # the encoder runs it in batch_size chunks
+        texts = [self._record_text(row) for _, row in records.iterrows()]
+        q_embs = self._encode_texts(texts) if texts else None
+
+        candidates, scores = [], []
+        if self.ann_index is not None:
+            # one batched index search instead of blocking each record
+            if texts:
+                candidates, scores = self._ann_candidates(q_embs, top_k)
+        else:
+            for i, (_, preprocessed) in enumerate(self.preprocess(records).iterrows()):
+                positions = self.blocker.candidates(preprocessed)
+                candidates.append(self.preprocessed_data.index[positions].to_numpy())
+                scores.append(self._score(positions, q_embs[i]))
+
+        min_score = self.match_threshold if kwargs.get('only_matches') else None
+        return self._ranking_frame(records.index, candidates, scores, top_k=top_k, min_score=min_score)
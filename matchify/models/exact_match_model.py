@@ -1,13 +1,36 @@
+import hashlib
+import numbers
+
+import numpy as np
 import pandas as pd
 
 from matchify.models.base_model import ERBaseModel
 
 
+def _row_hash(values) -> int:
+    # built-in hash() of a str is salted per process, so spawned eval
+    # workers would never agree with the parent's matchify_hash. this is
+    # a content hash with hash()'s equality: 1 == 1.0, and NaNs match.
+    h = hashlib.blake2b(digest_size=8)
+    for v in values:
+        if pd.isna(v):
+            token = 'nan'
+        elif isinstance(v, numbers.Number):
+            token = f'n:{float(v)!r}'
+        else:
+            token = f's:{v}'
+        h.update(token.encode('utf-8'))
+        h.update(b'\x00')
+    return int.from_bytes(h.digest(), 'little', signed=True)
+
+
 class ExactMatchModel(ERBaseModel):
     """
     Deterministic exact-match model. Hashes records over non-ignored
     fields and treats rows with the same hash as matches. No training.
     """
+    match_threshold = 1
+
     def preprocess(self) -> pd.DataFrame:
         """
         Since the exact matching doesn't require any specific preprocessing, we just return the data
@@ -22,10 +45,12 @@ class ExactMatchModel(ERBaseModel):
 
     def cluster(self):
         df = self.df
-        df['matchify_hash'] = df.apply(lambda row: hash(tuple(row[[x for x in df.columns if x not in self.ignored_columns]])), axis=1)
+        df['matchify_hash'] = df.apply(lambda row: _row_hash(row[[x for x in df.columns if x not in self.ignored_columns]]), axis=1)
         df["predicted_group_id"] = df["matchify_hash"].rank(method="dense", ascending=True)
         self.is_clustered = True
         self.df = df
+        # hash -> row positions, so batch lookups skip the full-column compare
+        self._hash_positions = df.groupby("matchify_hash").indices
         return df
 
     def predict(self, record: pd.Series, **kwargs) -> pd.DataFrame:
@@ -37,7 +62,7 @@ class ExactMatchModel(ERBaseModel):
         return_full_record = kwargs.get('return_full_record')
         only_matches = kwargs.get('only_matches')
 
-        record_hash = hash(tuple(record[[x for x in record.index if x not in self.ignored_columns]]))
+        record_hash = _row_hash(record[[x for x in record.index if x not in self.ignored_columns]])
         # to save memory we add a new column to the original loaded dataset and delete it later
         results = self.df
         results["score"] = results["matchify_hash"].apply(lambda x: 1 if x == record_hash else 0)
@@ -46,3 +71,30 @@ class ExactMatchModel(ERBaseModel):
         results = results[['id', 'score']] if not return_full_record else results
 
         return results.sort_values(by='score', ascending=False)
+
+    def predict_many(self, records: pd.DataFrame, top_k=None, **kwargs) -> pd.DataFrame:
+        """
+        Rank candidates for a batch of records. Each record is hashed once and
+        matched against the clustered hashes, no per-record frame rebuilds.
+        """
+        if not self.is_clustered:
+            self.cluster()
+        only_matches = kwargs.get('only_matches')
+
+        columns = [x for x in records.columns if x not in self.ignored_columns]
+        record_hashes = [_row_hash(row) for _, row in records[columns].iterrows()]
+
+        df_hashes = self.df["matchify_hash"].to_numpy()
+        labels = self.df.index.to_numpy()
+        if only_matches:
+            empty = np.array([], dtype=np.int64)
+            candidates, scores = [], []
+            for record_hash in record_hashes:
+                positions = self._hash_positions.get(record_hash, empty)
+                candidates.append(labels[positions])
+                scores.append(np.ones(len(positions)))
+        else:
+            candidates = [labels] * len(record_hashes)
+            scores = [(df_hashes == record_hash).astype(float) for record_hash in record_hashes]
+
+        return self._ranking_frame(records.index, candidates, scores, top_k=top_k)
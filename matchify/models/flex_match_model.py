@@ -1,12 +1,12 @@
 
-import jellyfish
+import numpy as np
 import pandas as pd
-import textdistance
-from gensim.parsing.preprocessing import preprocess_string, strip_punctuation
 from sklearn.feature_extraction.text import TfidfVectorizer
 from sklearn.metrics.pairwise import cosine_similarity
 
+from matchify import similarity
 from matchify.models.base_model import ERBaseModel
+from matchify.utils import normalizers
 
 
 class FlexMatchModel(ERBaseModel):
@@ -26,15 +26,41 @@ class FlexMatchModel(ERBaseModel):
         ignored_columns,
         test_size: float = 0.0,
         random_state: int = 0,
+        n_jobs: int = None,
+        artifacts=None,
     ):
-        super().__init__(df, ignored_columns, test_size=test_size, random_state=random_state)
+        super().__init__(
+            df, ignored_columns, test_size=test_size, random_state=random_state, artifacts=artifacts,
+        )
         self.field_config = field_config
         self.blocking_config = blocking_config
-        self.blocking_key = list(blocking_config.keys())[0]
-        self.preprocessed_data = self.preprocess(df)
+        # worker processes for normalizing large columns in preprocess
+        self.n_jobs = n_jobs
+        if self.artifacts is None:
+            self.preprocessed_data = self.preprocess(df)
+        else:
+            # normalization doesn't depend on the seed, so it runs once per
+            # artifacts bundle. each model works on its own copy.
+            shared = self._shared('preprocessed', lambda: self.preprocess(df.copy()))
+            self._set_blocking_fields()
+            self.df = self.preprocessed_data = shared.copy()
+        # every blocking pass is indexed once here and reused by every predict
+        self.blocker = self._build_blocker()
 
         self.models = {}
         self.max_score = len(list(field_config.keys()))
+        # each compared column as str values, positionally aligned with
+        # preprocessed_data, so a candidate block is a fancy-index slice
+        # instead of a .loc row lookup per candidate
+        self._field_strings = self._shared('field_strings', lambda: {
+            field: self._column_strings(self.preprocessed_data[field]) for field in self.field_config
+        })
+        # interned token sets per jaccard column, built on first use
+        self._token_stores = {}
+        self._tfidf_matrices = {}
+        # comparisons run and skipped by top-k pruning, across predict calls
+        self.pruning_stats = {'queries': 0, 'comparisons': 0, 'pruned': 0}
+        self._pruning_order = None
 
     def preprocess(self, df) -> pd.DataFrame:
         # Preprocess data based on field types
@@ -42,34 +68,37 @@ class FlexMatchModel(ERBaseModel):
 
         for field, config in self.field_config.items():
             field_type = config["type"]
-            if field_type == "name":
-                preprocessed_data[field] = preprocessed_data[field].apply(self._normalize_name)
-            elif field_type == "phone":
-                preprocessed_data[field] = preprocessed_data[field].apply(self._normalize_phone)
-            elif field_type == "address":
-                preprocessed_data[field] = preprocessed_data[field].apply(self._normalize_address)
-            elif field_type == "date":
-                preprocessed_data[field] = preprocessed_data[field].apply(self._normalize_date)
+            if field_type in normalizers.NORMALIZERS:
+                preprocessed_data[field] = self._normalize_column(field_type, preprocessed_data[field])
 
         for field, config in self.blocking_config.items():
-            # add necessary fields for blocking purposes
+            # add necessary fields for blocking purposes. composite passes
+            # list their source columns under 'fields'.
             if config['method'] == 'prefix':
                 prefix_len = config['threshold']
-                prefix_field = f"{field}_prefix_{prefix_len}"
-                self.blocking_config[field]['field'] = prefix_field
-                # bind prefix_len explicitly. otherwise the lambda captures the loop variable
-                preprocessed_data[prefix_field] = preprocessed_data[field].apply(
-                    lambda x, p=prefix_len: x[:p]
-                )
+                for source, prefix_field in self._prefix_columns(field, config):
+                    # bind prefix_len explicitly. otherwise the lambda captures the loop variable
+                    preprocessed_data[prefix_field] = preprocessed_data[source].apply(
+                        lambda x, p=prefix_len: x[:p]
+                    )
+        self._set_blocking_fields()
         return preprocessed_data
 
     def train(self):
         for field, config in self.field_config.items():
             if config['comparison_method'] == "tfidf_cosine":
-                cleaned_column = self.df[field][self.df[field].astype(bool)].values.astype('U')
-                vectorizer = TfidfVectorizer()
-                vectorizer.fit(cleaned_column)
-                self.models[field] = vectorizer
+                self.models[field], self._tfidf_matrices[field] = self._shared(
+                    f'tfidf:{field}', lambda field=field: self._fit_tfidf(field),
+                )
+
+    def _fit_tfidf(self, field):
+        cleaned_column = self.df[field][self.df[field].astype(bool)].values.astype('U')
+        vectorizer = TfidfVectorizer()
+        vectorizer.fit(cleaned_column)
+        # the whole column vectorized once. TfidfVectorizer rows are
+        # L2-normalized, so a block's cosine scores are one sparse
+        # matrix-vector product against the query row.
+        return vectorizer, vectorizer.transform(self._field_strings[field]).tocsr()
 
     def tfidf_cosine_similarity(self, s1, s2, vectorizer):
         # Transform the descriptions using the fitted TfidfVectorizer
@@ -80,85 +109,145 @@ class FlexMatchModel(ERBaseModel):
         return cosine_similarity(str1_tfidf, str2_tfidf)[0][0]
 
     # Comparison methods
+    @staticmethod
+    def _column_strings(column: pd.Series) -> np.ndarray:
+        # str() per value, the same coercion _compare_strings applies
+        return np.array([str(v) for v in column], dtype=object)
+
     def _compare_strings(self, s1: str, s2: str, method: str, column: str) -> float:
         s1 = str(s1) or ""
         s2 = str(s2) or ""
-        if method == 'jaro_winkler':
-            return jellyfish.jaro_winkler_similarity(s1, s2)
-        elif method == 'levenshtein':
-            return textdistance.levenshtein.normalized_similarity(s1, s2)
-        elif method == 'tfidf_cosine':
+        if method == 'tfidf_cosine':
             return self.tfidf_cosine_similarity(s1, s2, self.models[column])
-        elif method == 'jaccard_similarity':
-            tokenized_s1 = set(preprocess_string(s1, filters=[strip_punctuation]))
-            tokenized_s2 = set(preprocess_string(s2, filters=[strip_punctuation]))
-            intersection = len(tokenized_s1.intersection(tokenized_s2))
-            union = len(tokenized_s1.union(tokenized_s2))
-            return float(intersection) / float(union) if union else 0.0
-        else:
-            raise ValueError(f"Unsupported comparison method: {method}")
-
-    # Blocking methods
-    def _apply_blocking(self, new_record: pd.Series) -> pd.MultiIndex:
-        preprocessed_new_record = self.preprocess(new_record.to_frame().T).iloc[0]
-        config = self.blocking_config[self.blocking_key]
-        method = config['method']
-        threshold = config['threshold']
-        blocking_field = config['field']
-        new_record_blocking_value = preprocessed_new_record[blocking_field]
-
-        if method == 'sorted_neighborhood':
-            # Sort the dataset based on the blocking field
-            sorted_data = self.preprocessed_data.sort_values(by=blocking_field)
-            # Find the position where the new record should be inserted
-            insert_position = sorted_data[blocking_field].searchsorted(new_record_blocking_value)
-            # Define the range of records around the new record's value
-            range_start = max(0, insert_position - threshold)
-            range_end = min(len(sorted_data), insert_position + threshold)
-            # Get the indices of the candidates
-            candidate_indices = sorted_data.iloc[range_start:range_end].index
-        elif method == 'prefix':
-            # Filter the dataset based on the new record's prefix
-            candidates = self.preprocessed_data[self.preprocessed_data[blocking_field] == new_record_blocking_value]
-            # Get the indices of the candidates
-            candidate_indices = candidates.index
-        elif method == 'block':
-            # Filter the dataset based on the new record's value
-            candidates = self.preprocessed_data[self.preprocessed_data[blocking_field] == new_record_blocking_value]
-            # Get the indices of the candidates
-            candidate_indices = candidates.index
-        elif method == 'full':
-            candidates = self.preprocessed_data
-            candidate_indices = self.preprocessed_data.index
-        # Add more blocking methods here
-        else:
-            raise ValueError(f"Unsupported blocking method: {method}")
-
-        return candidate_indices
-
-    def predict(self, record: pd.Series, **kwargs) -> pd.DataFrame:
+        return similarity.similarity(s1, s2, method)
+
+    def _compare_block(self, value, positions: np.ndarray, method: str, column: str) -> np.ndarray:
+        """
+        Score one query value against a whole candidate block of `column`.
+        Same results as _compare_strings per pair, as one float array
+        aligned with positions.
+        """
+        s1 = str(value)
+        if method == 'tfidf_cosine':
+            query = self.models[column].transform([s1])
+            return (self._tfidf_matrices[column][positions] @ query.T).toarray().ravel()
+        if method == 'jaccard_similarity':
+            if column not in self._token_stores:
+                self._token_stores[column] = self._shared(
+                    f'token_store:{column}', lambda: similarity.TokenStore(self._field_strings[column]),
+                )
+            store = self._token_stores[column]
+            return store.jaccard(store.encode(s1), positions)
+        # float64 so the summed field scores match the scalar path exactly
+        block = self._field_strings[column][positions]
+        return similarity.one_to_many(s1, block, method, dtype=np.float64)
+
+    def _score_candidates(self, preprocessed_record: pd.Series, positions: np.ndarray) -> np.ndarray:
+        # one batched comparison per field over the whole block, then the
+        # field scores are summed and normalized as arrays
+        total = np.zeros(len(positions))
+        for field, config in self.field_config.items():
+            total += self._compare_block(
+                preprocessed_record[field], positions, config['comparison_method'], field,
+            )
+        if self.max_score == 0:
+            return np.ones(len(positions))
+        return self._normalize_score(total, min_score=0, max_score=self.max_score)
+
+    # relative cost of one comparison per method. top-k pruning runs the
+    # cheap fields first so the expensive ones only see the survivors.
+    _METHOD_COST = {'jaro_winkler': 1, 'levenshtein': 1, 'jaccard_similarity': 2, 'tfidf_cosine': 3}
+
+    def _field_order(self) -> list:
+        # cheapest method first, shorter strings first within a method
+        if self._pruning_order is None:
+            def cost(field):
+                method = self.field_config[field]['comparison_method']
+                values = self._field_strings[field]
+                mean_length = np.mean([len(v) for v in values]) if len(values) else 0.0
+                return self._METHOD_COST.get(method, 2), mean_length
+            self._pruning_order = sorted(self.field_config, key=cost)
+        return self._pruning_order
+
+    def _score_top_k(self, preprocessed_record: pd.Series, positions: np.ndarray, top_k: int):
+        """
+        Score a block for top-k retrieval with upper-bound pruning.
+
+        Fields are compared cheapest first. Every field score is in [0, 1],
+        so after each field a candidate's final sum is at most its partial
+        sum plus the number of fields left. Candidates whose bound is below
+        the k-th best partial sum so far can't reach the top k and are
+        dropped before the next field. Survivors' scores are re-summed in
+        field_config order, so they and the top-k ranking are identical to
+        the unpruned path.
+
+        Returns (surviving positions, their scores, pruned comparisons).
+        """
+        n_fields = len(self.field_config)
+        if top_k is None or len(positions) <= top_k or n_fields == 0:
+            return positions, self._score_candidates(preprocessed_record, positions), 0
+
+        alive = np.arange(len(positions))
+        partial = np.zeros(len(positions))
+        field_scores = {}
+        pruned = 0
+        for done, field in enumerate(self._field_order(), start=1):
+            method = self.field_config[field]['comparison_method']
+            field_scores[field] = np.zeros(len(positions))
+            field_scores[field][alive] = self._compare_block(
+                preprocessed_record[field], positions[alive], method, field,
+            )
+            partial[alive] += field_scores[field][alive]
+            remaining = n_fields - done
+            if remaining and len(alive) > top_k:
+                kth = np.partition(partial[alive], -top_k)[-top_k]
+                # small slack so summation-order rounding never drops a tie
+                keep = partial[alive] + remaining + 1e-9 >= kth
+                pruned += int((~keep).sum()) * remaining
+                alive = alive[keep]
+
+        total = np.zeros(len(alive))
+        for field in self.field_config:
+            total += field_scores[field][alive]
+        scores = self._normalize_score(total, min_score=0, max_score=self.max_score)
+        return positions[alive], scores, pruned
+
+    def _record_pruning(self, n_candidates, pruned):
+        self.pruning_stats['queries'] += 1
+        self.pruning_stats['comparisons'] += n_candidates * len(self.field_config) - pruned
+        self.pruning_stats['pruned'] += pruned
+
+    def predict(self, record: pd.Series, top_k: int = None, **kwargs) -> pd.DataFrame:
+        """
+        Score record against its blocking candidates, best first. With
+        top_k only the k best are returned and candidates that can't make
+        the cut are pruned early. The number of skipped field comparisons
+        is in result.attrs['pruned_comparisons'].
+        """
         preprocessed_record = self.preprocess(record.to_frame().T).iloc[0]
         # Apply the blocking method specified by the user
-        candidate_indices = self._apply_blocking(record)
-        # Calculate similarity scores for each pair
-        scores = []
-        for candidate_id in candidate_indices:
-            record_b = self.preprocessed_data.loc[candidate_id]
-
-            similarity = 0
-            for field, config in self.field_config.items():
-                comparison_method = config['comparison_method']
-                field_similarity = self._compare_strings(preprocessed_record[field], record_b[field], comparison_method, field)
-                similarity += field_similarity
-            similarity = self._normalize_score(similarity, min_score=0, max_score=self.max_score)
-            scores.append((candidate_id, similarity))
-
-        scores_df = pd.DataFrame(scores, columns=['Index', 'score'])
-        sorted_scores_df = scores_df.sort_values(by='score', ascending=False).drop_duplicates().reset_index(drop=True)
-
-        # Add original records to the result DataFrame
-        best_matches = self.df.loc[sorted_scores_df['Index']].reset_index(drop=True)
-        sorted_scores_df = sorted_scores_df.drop(columns='Index').reset_index(drop=True)
-        result_df = pd.concat([best_matches, sorted_scores_df], axis=1)
+        positions = self.blocker.candidates(preprocessed_record)
+        n_candidates = len(positions)
+        positions, scores, pruned = self._score_top_k(preprocessed_record, positions, top_k)
+        self._record_pruning(n_candidates, pruned)
+
+        # build the result frame once, best score first
+        order = np.argsort(-scores, kind='stable')[:top_k]
+        result_df = self.df.iloc[positions[order]].reset_index(drop=True)
+        result_df['score'] = scores[order]
+        result_df.attrs['pruned_comparisons'] = pruned
 
         return result_df
+
+    def predict_many(self, records: pd.DataFrame, top_k=None, **kwargs) -> pd.DataFrame:
+        # preprocess the whole batch once, then block and score per record
+        preprocessed_records = self.preprocess(records.copy())
+        candidates, scores = [], []
+        for _, preprocessed_record in preprocessed_records.iterrows():
+            positions = self.blocker.candidates(preprocessed_record)
+            n_candidates = len(positions)
+            positions, block_scores, pruned = self._score_top_k(preprocessed_record, positions, top_k)
+            self._record_pruning(n_candidates, pruned)
+            candidates.append(self.preprocessed_data.index[positions].to_numpy())
+            scores.append(block_scores)
+        return self._ranking_frame(records.index, candidates, scores, top_k=top_k)
@@ -1,15 +1,12 @@
-import random
-
-import jellyfish
 import numpy as np
 import pandas as pd
-import textdistance
-from gensim.parsing.preprocessing import preprocess_string, strip_punctuation
 from sklearn.feature_extraction.text import TfidfVectorizer
-from sklearn.metrics.pairwise import cosine_similarity
 from sklearn.neural_network import MLPClassifier
+from sklearn.preprocessing import normalize
 
+from matchify import similarity
 from matchify.models.base_model import ERBaseModel
+from matchify.utils import normalizers
 
 
 class MLPMatchModel(ERBaseModel):
@@ -33,49 +30,80 @@ class MLPMatchModel(ERBaseModel):
         max_iter: int = 200,
         random_state: int = 42,
         test_size: float = 0.0,
+        n_jobs: int = None,
+        artifacts=None,
     ):
-        super().__init__(df, ignored_columns, test_size=test_size, random_state=random_state)
+        super().__init__(
+            df, ignored_columns, test_size=test_size, random_state=random_state, artifacts=artifacts,
+        )
         self.field_config = field_config
         self.blocking_config = blocking_config
-        self.blocking_key = list(blocking_config.keys())[0]
+        # worker processes for normalizing large columns in preprocess
+        self.n_jobs = n_jobs
         self.n_pairs = n_pairs
         self.hidden_layer_sizes = hidden_layer_sizes
         self.max_iter = max_iter
 
-        self.preprocessed_data = self.preprocess(df)
+        # preprocess copies df, so a shared frame is never mutated
+        self.preprocessed_data = self._shared('preprocessed', lambda: self.preprocess(df))
+        self._set_blocking_fields()
+        # compared columns as str values ("" for missing), positionally
+        # aligned with preprocessed_data for block-wise feature extraction
+        self._field_strings = self._shared('field_strings', lambda: {
+            field: np.array(
+                ["" if pd.isna(v) else str(v) for v in self.preprocessed_data[field]], dtype=object,
+            )
+            for field in self.field_config
+        })
+        # every blocking pass is indexed once here and reused by every predict
+        self.blocker = self._build_blocker()
         self.vectorizers = {}
-        # tfidf vector and jaccard token cache. populated in train() so
-        # pair feature extraction reuses them instead of recomputing.
-        self._tfidf_cache = {}
-        self._token_cache = {}
+        # tfidf matrices and interned jaccard token stores, one per field.
+        # populated in train() so pair feature extraction reuses them
+        # instead of recomputing. both are positional over self.df and
+        # _df_positions maps index labels to rows.
+        self._tfidf_matrices = {}
+        self._token_stores = {}
+        self._df_positions = {}
         self.classifier = None
 
+    def _cache_params(self) -> dict:
+        return {
+            **super()._cache_params(),
+            'n_pairs': self.n_pairs,
+            'hidden_layer_sizes': self.hidden_layer_sizes,
+            'max_iter': self.max_iter,
+        }
+
     def preprocess(self, df) -> pd.DataFrame:
         preprocessed_data = df.copy()
 
         for field, config in self.field_config.items():
             field_type = config["type"]
-            if field_type == "name":
-                preprocessed_data[field] = preprocessed_data[field].apply(self._normalize_name)
-            elif field_type == "phone":
-                preprocessed_data[field] = preprocessed_data[field].apply(self._normalize_phone)
-            elif field_type == "address":
-                preprocessed_data[field] = preprocessed_data[field].apply(self._normalize_address)
-            elif field_type == "date":
-                preprocessed_data[field] = preprocessed_data[field].apply(self._normalize_date)
+            if field_type in normalizers.NORMALIZERS:
+                preprocessed_data[field] = self._normalize_column(field_type, preprocessed_data[field])
 
         for field, config in self.blocking_config.items():
             if config['method'] == 'prefix':
                 prefix_len = config['threshold']
-                prefix_field = f"{field}_prefix_{prefix_len}"
-                self.blocking_config[field]['field'] = prefix_field
-                # bind prefix_len explicitly. otherwise the lambda captures the loop variable
-                preprocessed_data[prefix_field] = preprocessed_data[field].apply(
-                    lambda x, p=prefix_len: str(x)[:p]
-                )
+                for source, prefix_field in self._prefix_columns(field, config):
+                    # bind prefix_len explicitly. otherwise the lambda captures the loop variable
+                    preprocessed_data[prefix_field] = preprocessed_data[source].apply(
+                        lambda x, p=prefix_len: str(x)[:p]
+                    )
+        self._set_blocking_fields()
         return preprocessed_data
 
     def _fit_vectorizers(self):
+        # fitted on the whole df, not the train partition, so these are
+        # the same for every seed
+        self.vectorizers, self._tfidf_matrices, self._token_stores = self._shared(
+            'vectorizers', self._build_vectorizers,
+        )
+        self._df_positions = {idx: i for i, idx in enumerate(self.df.index)}
+
+    def _build_vectorizers(self):
+        vectorizers, tfidf_matrices, token_stores = {}, {}, {}
         for field in self.field_config:
             methods = self._feature_methods(field)
             col = self.df[field].fillna('').astype(str)
@@ -84,17 +112,14 @@ class MLPMatchModel(ERBaseModel):
                 if len(cleaned) > 0:
                     vec = TfidfVectorizer()
                     vec.fit(cleaned)
-                    self.vectorizers[field] = vec
-                    # vectorize every record once
-                    matrix = vec.transform(col.values)
-                    for idx, vector_row in zip(self.df.index, matrix):
-                        self._tfidf_cache[(idx, field)] = vector_row
+                    vectorizers[field] = vec
+                    # vectorize every record once into one row-normalized
+                    # CSR matrix, so cosine is a sparse dot product
+                    tfidf_matrices[field] = normalize(vec.transform(col.values)).tocsr()
             if 'jaccard' in methods:
                 # tokenize every record once
-                for idx, value in zip(self.df.index, col.values):
-                    self._token_cache[(idx, field)] = set(
-                        preprocess_string(value, filters=[strip_punctuation])
-                    )
+                token_stores[field] = similarity.TokenStore(col.values)
+        return vectorizers, tfidf_matrices, token_stores
 
     def _feature_methods(self, field):
         # 4 similarity features per field by default.
@@ -115,92 +140,193 @@ class MLPMatchModel(ERBaseModel):
                 feats.append(self._compare(s1, s2, method, field, idx_a, idx_b))
         return np.asarray(feats, dtype=float)
 
+    def _block_features(self, preprocessed_record: pd.Series, positions: np.ndarray) -> np.ndarray:
+        """
+        Feature rows for one record against a candidate block, built one
+        feature column at a time. Same values as stacking _pair_features
+        over the block.
+        """
+        candidate_ids = self.preprocessed_data.index[positions]
+        feats = np.zeros((len(positions), self._n_features()))
+        col = 0
+        for field in self.field_config:
+            v1 = preprocessed_record.get(field)
+            s1 = "" if pd.isna(v1) else str(v1)
+            block = self._field_strings[field][positions]
+            # the scalar path scores a pair 0 when either side is empty
+            present = block != ""
+            for method in self._feature_methods(field):
+                if s1 and present.any():
+                    if method == 'jaccard' and field in self._token_stores:
+                        query = self._jaccard_query(field, s1, preprocessed_record.name)
+                        feats[present, col] = self._token_stores[field].jaccard(query, positions[present])
+                    elif method == 'tfidf_cosine':
+                        if field in self._tfidf_matrices:
+                            query = self._tfidf_query(field, s1, preprocessed_record.name)
+                            block_matrix = self._tfidf_matrices[field][positions[present]]
+                            feats[present, col] = (block_matrix @ query.T).toarray().ravel()
+                    elif method == 'jaccard':
+                        idx_a = preprocessed_record.name
+                        feats[present, col] = [
+                            self._compare(s1, s2, method, field, idx_a, idx_b)
+                            for s2, idx_b in zip(block[present], candidate_ids[present])
+                        ]
+                    else:
+                        feats[present, col] = similarity.one_to_many(
+                            s1, block[present], method, dtype=np.float64,
+                        )
+                col += 1
+        return feats
+
+    def _stored_position(self, field, s, idx):
+        # row of self.df whose stored vector/tokens stand for s. an outside
+        # record can share an index label with a training row, so the label
+        # only counts when that row's text is s as well.
+        pos = self._df_positions.get(idx)
+        if pos is not None and self._field_strings[field][pos] == s:
+            return pos
+        return None
+
+    def _tfidf_query(self, field, s, idx=None):
+        # records from self.df use their stored row, others are vectorized
+        pos = self._stored_position(field, s, idx)
+        if pos is not None:
+            return self._tfidf_matrices[field][pos]
+        return normalize(self.vectorizers[field].transform([s]))
+
+    def _jaccard_query(self, field, s, idx=None):
+        # records from self.df use their stored tokens, others are tokenized
+        store = self._token_stores[field]
+        pos = self._stored_position(field, s, idx)
+        return store.encode_row(pos) if pos is not None else store.encode(s)
+
+    def _n_features(self) -> int:
+        return sum(len(self._feature_methods(field)) for field in self.field_config)
+
     def _compare(self, s1: str, s2: str, method: str, field: str, idx_a=None, idx_b=None) -> float:
         if not s1 or not s2:
             return 0.0
-        if method == 'jaro_winkler':
-            return jellyfish.jaro_winkler_similarity(s1, s2)
-        if method == 'levenshtein':
-            return textdistance.levenshtein.normalized_similarity(s1, s2)
         if method == 'tfidf_cosine':
-            vec = self.vectorizers.get(field)
-            if vec is None:
+            if field not in self._tfidf_matrices:
                 return 0.0
-            t1 = self._tfidf_cache.get((idx_a, field))
-            if t1 is None:
-                t1 = vec.transform([s1])
-            t2 = self._tfidf_cache.get((idx_b, field))
-            if t2 is None:
-                t2 = vec.transform([s2])
-            return float(cosine_similarity(t1, t2)[0][0])
+            t1 = self._tfidf_query(field, s1, idx_a)
+            t2 = self._tfidf_query(field, s2, idx_b)
+            return float((t1 @ t2.T).toarray()[0, 0])
         if method == 'jaccard':
-            tok_a = self._token_cache.get((idx_a, field))
-            if tok_a is None:
-                tok_a = set(preprocess_string(s1, filters=[strip_punctuation]))
-            tok_b = self._token_cache.get((idx_b, field))
-            if tok_b is None:
-                tok_b = set(preprocess_string(s2, filters=[strip_punctuation]))
-            union = tok_a | tok_b
-            return len(tok_a & tok_b) / len(union) if union else 0.0
-        raise ValueError(f"Unsupported comparison method: {method}")
+            store = self._token_stores.get(field)
+            pos_a, pos_b = self._stored_position(field, s1, idx_a), self._stored_position(field, s2, idx_b)
+            if store is not None and pos_b is not None:
+                return float(store.jaccard(self._jaccard_query(field, s1, idx_a), [pos_b])[0])
+            tok_a = store.token_set(pos_a) if store is not None and pos_a is not None else similarity.tokenize(s1)
+            return similarity.jaccard(tok_a, similarity.tokenize(s2))
+        return similarity.similarity(s1, s2, method)
 
-    def _sample_training_pairs(self):
-        """Pull positive and negative pairs from train-split group_id supervision."""
+    def _sample_pair_positions(self):
+        """
+        Sample training pairs from train-split group_id supervision as
+        positional index arrays into self.df, with a Generator seeded by
+        random_state. Returns (left, right, labels): n_pairs // 2
+        positives (same group_id) followed by as many negatives (two
+        train rows from different groups, or with no group).
+        """
         if 'group_id' not in self.df.columns:
             raise Exception('MLPMatchModel requires a group_id column for training')
 
-        rng = random.Random(self.random_state)
+        rng = np.random.default_rng(self.random_state)
+        n_each = self.n_pairs // 2
         # restrict pair sampling to the train partition. when test_size=0
-        # this is the full df (back-compat). use .groups (label-based) so
-        # downstream .loc[] lookups hit the right rows even when the
-        # train partition is non-contiguous.
-        train_df = self.df.loc[self._train_idx]
+        # this is the full df.
+        train_positions = self.df.index.get_indexer(self._train_idx)
+        codes = pd.factorize(self.df['group_id'])[0][train_positions]
 
-        groups = train_df.dropna(subset=['group_id']).groupby('group_id').groups
-        candidate_groups = [list(idxs) for idxs in groups.values() if len(idxs) >= 2]
+        # positives: a random group with 2+ train members, then two distinct members
+        grouped = train_positions[codes >= 0]
+        grouped_codes = codes[codes >= 0]
+        order = np.argsort(grouped_codes, kind='stable')
+        members = grouped[order]
+        _, starts, sizes = np.unique(grouped_codes[order], return_index=True, return_counts=True)
+        starts, sizes = starts[sizes >= 2], sizes[sizes >= 2]
+        if len(sizes) and n_each:
+            group = rng.integers(0, len(sizes), n_each)
+            first = rng.integers(0, sizes[group])
+            second = rng.integers(0, sizes[group] - 1)
+            second += second >= first
+            pos_left = members[starts[group] + first]
+            pos_right = members[starts[group] + second]
+        else:
+            pos_left = pos_right = np.zeros(0, dtype=np.int64)
 
-        n_each = self.n_pairs // 2
-        positives = []
-        attempts = 0
-        while len(positives) < n_each and attempts < n_each * 10:
-            attempts += 1
-            if not candidate_groups:
+        # negatives: two distinct train rows not sharing a group. drawn in
+        # oversized rounds and filtered, bounded like the old rejection loop.
+        neg_left, neg_right = [], []
+        found = 0
+        for _ in range(20):
+            if found >= n_each or len(train_positions) < 2:
                 break
-            grp = rng.choice(candidate_groups)
-            i, j = rng.sample(grp, 2)
-            positives.append((i, j))
-
-        # negatives: two train rows from different groups
-        train_indices = train_df.index.to_list()
-        group_lookup = train_df['group_id'].to_dict()
-        negatives = []
-        attempts = 0
-        while len(negatives) < n_each and attempts < n_each * 20:
-            attempts += 1
-            i, j = rng.sample(train_indices, 2)
-            gi, gj = group_lookup.get(i), group_lookup.get(j)
-            if pd.isna(gi) or pd.isna(gj) or gi != gj:
-                negatives.append((i, j))
-
-        return positives, negatives
+            draw = 2 * (n_each - found)
+            i = rng.integers(0, len(train_positions), draw)
+            j = rng.integers(0, len(train_positions), draw)
+            ok = (i != j) & ((codes[i] < 0) | (codes[j] < 0) | (codes[i] != codes[j]))
+            neg_left.append(train_positions[i[ok]])
+            neg_right.append(train_positions[j[ok]])
+            found += int(ok.sum())
+        neg_left = np.concatenate(neg_left)[:n_each] if neg_left else np.zeros(0, dtype=np.int64)
+        neg_right = np.concatenate(neg_right)[:n_each] if neg_right else np.zeros(0, dtype=np.int64)
+
+        left = np.concatenate((pos_left, neg_left)).astype(np.int64)
+        right = np.concatenate((pos_right, neg_right)).astype(np.int64)
+        labels = np.concatenate((np.ones(len(pos_left), dtype=int), np.zeros(len(neg_left), dtype=int)))
+        return left, right, labels
+
+    def _sample_training_pairs(self):
+        """Pull positive and negative pairs from train-split group_id supervision, as index labels."""
+        left, right, labels = self._sample_pair_positions()
+        pairs = list(zip(self.df.index[left], self.df.index[right]))
+        n_positive = int(labels.sum())
+        return pairs[:n_positive], pairs[n_positive:]
+
+    def _paired_features(self, left: np.ndarray, right: np.ndarray) -> np.ndarray:
+        """
+        Feature rows for the row pairs (left[i], right[i]), positions into
+        self.df, built one feature column at a time. Same values as
+        _pair_features on each pair.
+        """
+        feats = np.zeros((len(left), self._n_features()))
+        col = 0
+        for field in self.field_config:
+            strings = self._field_strings[field]
+            s1, s2 = strings[left], strings[right]
+            # the scalar path scores a pair 0 when either side is empty
+            present = (s1 != "") & (s2 != "")
+            for method in self._feature_methods(field):
+                if present.any():
+                    if method == 'jaccard' and field in self._token_stores:
+                        feats[present, col] = self._token_stores[field].paired_jaccard(
+                            left[present], right[present],
+                        )
+                    elif method == 'tfidf_cosine':
+                        feats[present, col] = self._paired_tfidf(field, left[present], right[present])
+                    else:
+                        feats[present, col] = similarity.paired(
+                            s1[present], s2[present], method, dtype=np.float64,
+                        )
+                col += 1
+        return feats
+
+    def _paired_tfidf(self, field, left, right) -> np.ndarray:
+        # row-wise cosine of the cached row-normalized tfidf rows
+        if field not in self._tfidf_matrices:
+            return np.zeros(len(left))
+        matrix = self._tfidf_matrices[field]
+        return np.asarray(matrix[left].multiply(matrix[right]).sum(axis=1)).ravel()
 
     def train(self):
         self._fit_vectorizers()
-        positives, negatives = self._sample_training_pairs()
-        if not positives or not negatives:
+        left, right, y = self._sample_pair_positions()
+        if not y.any() or y.all():
             raise Exception('Could not sample any training pairs - check group_id supervision')
 
-        X = []
-        y = []
-        for i, j in positives:
-            X.append(self._pair_features(self.preprocessed_data.loc[i], self.preprocessed_data.loc[j]))
-            y.append(1)
-        for i, j in negatives:
-            X.append(self._pair_features(self.preprocessed_data.loc[i], self.preprocessed_data.loc[j]))
-            y.append(0)
-
-        X = np.vstack(X)
-        y = np.asarray(y)
+        X = self._paired_features(left, right)
 
         self.classifier = MLPClassifier(
             hidden_layer_sizes=self.hidden_layer_sizes,
@@ -209,42 +335,20 @@ class MLPMatchModel(ERBaseModel):
         )
         self.classifier.fit(X, y)
 
-    def _apply_blocking(self, new_record: pd.Series) -> pd.Index:
-        preprocessed = self.preprocess(new_record.to_frame().T).iloc[0]
-        config = self.blocking_config[self.blocking_key]
-        method = config['method']
-        threshold = config['threshold']
-        blocking_field = config['field']
-        key = preprocessed[blocking_field]
-
-        if method == 'prefix' or method == 'block':
-            return self.preprocessed_data[
-                self.preprocessed_data[blocking_field] == key
-            ].index
-        if method == 'sorted_neighborhood':
-            sorted_data = self.preprocessed_data.sort_values(by=blocking_field)
-            pos = sorted_data[blocking_field].searchsorted(key)
-            return sorted_data.iloc[max(0, pos - threshold): pos + threshold].index
-        if method == 'full':
-            return self.preprocessed_data.index
-        raise ValueError(f"Unsupported blocking method: {method}")
-
     def predict(self, record: pd.Series, **kwargs) -> pd.DataFrame:
         if self.classifier is None:
             raise Exception('Call train() before predict()')
 
         preprocessed_record = self.preprocess(record.to_frame().T).iloc[0]
-        candidate_indices = self._apply_blocking(record)
+        positions = self.blocker.candidates(preprocessed_record)
+        candidate_indices = self.preprocessed_data.index[positions]
         if len(candidate_indices) == 0:
             empty = self.df.iloc[0:0].copy()
             empty['score'] = []
             return empty
 
         # Score all candidates in one batched predict_proba call.
-        feats = np.vstack([
-            self._pair_features(preprocessed_record, self.preprocessed_data.loc[idx])
-            for idx in candidate_indices
-        ])
+        feats = self._block_features(preprocessed_record, positions)
         probs = self.classifier.predict_proba(feats)[:, 1]
 
         scores_df = pd.DataFrame({'Index': list(candidate_indices), 'score': probs})
@@ -253,3 +357,20 @@ class MLPMatchModel(ERBaseModel):
         best_matches = self.df.loc[sorted_scores['Index']].reset_index(drop=True)
         sorted_scores = sorted_scores.drop(columns='Index').reset_index(drop=True)
         return pd.concat([best_matches, sorted_scores], axis=1)
+
+    def predict_many(self, records: pd.DataFrame, top_k=None, **kwargs) -> pd.DataFrame:
+        if self.classifier is None:
+            raise Exception('Call train() before predict()')
+
+        # preprocess once per batch, then one predict_proba over every
+        # (record, candidate) pair in the batch.
+        preprocessed_records = self.preprocess(records)
+        candidates, feats = [], []
+        for _, preprocessed_record in preprocessed_records.iterrows():
+            positions = self.blocker.candidates(preprocessed_record)
+            candidates.append(self.preprocessed_data.index[positions].to_numpy())
+            feats.append(self._block_features(preprocessed_record, positions))
+        n_pairs = sum(len(c) for c in candidates)
+        probs = self.classifier.predict_proba(np.vstack(feats))[:, 1] if n_pairs else np.array([])
+        scores = np.split(probs, np.cumsum([len(c) for c in candidates])[:-1])
+        return self._ranking_frame(records.index, candidates, scores, top_k=top_k)
@@ -4,10 +4,13 @@ import tempfile
 
 import pandas as pd
 
+from matchify.ann import build_ann_index
 from matchify.models.base_model import ERBaseModel
+from matchify.models.embedding_retrieval import EmbeddingRetrievalMixin
+from matchify.utils.embedding_cache import encoder_state_hash
 
 
-class SiameseMatchModel(ERBaseModel):
+class SiameseMatchModel(EmbeddingRetrievalMixin, ERBaseModel):
     """
     Supervised embedding model. Fine-tunes a SentenceTransformer with
     contrastive loss on sampled positive/negative record pairs, then
@@ -17,6 +20,7 @@ class SiameseMatchModel(ERBaseModel):
     Positives share a group_id, negatives do not.
     """
     DEFAULT_MODEL = "sentence-transformers/all-MiniLM-L6-v2"
+    match_threshold = 0.5
 
     def __init__(
         self,
@@ -32,8 +36,17 @@ class SiameseMatchModel(ERBaseModel):
         random_state: int = 42,
         save_path: str = None,
         test_size: float = 0.0,
+        ann_config=None,
+        embedding_cache=None,
+        query_batch_wait_ms=None,
+        embedding_dtype: str = 'float32',
+        rescore_k: int = None,
+        rescore_path: str = None,
+        artifacts=None,
     ):
-        super().__init__(df, ignored_columns, test_size=test_size, random_state=random_state)
+        super().__init__(
+            df, ignored_columns, test_size=test_size, random_state=random_state, artifacts=artifacts,
+        )
         try:
             from sentence_transformers import SentenceTransformer
         except ImportError as e:
@@ -44,9 +57,6 @@ class SiameseMatchModel(ERBaseModel):
 
         self.field_config = field_config
         self.blocking_config = blocking_config or {}
-        self.blocking_key = (
-            list(self.blocking_config.keys())[0] if self.blocking_config else None
-        )
         self.base_model = base_model
         self.n_pairs = n_pairs
         self.epochs = epochs
@@ -56,17 +66,39 @@ class SiameseMatchModel(ERBaseModel):
         self.save_path = save_path
 
         self.encoder = SentenceTransformer(base_model)
-        self.preprocessed_data = self.preprocess(df)
-        self.embeddings = None
+        self.preprocessed_data = self._shared('preprocessed', lambda: self.preprocess(df))
+        self._set_blocking_fields()
+        # every blocking pass is indexed once here and reused by every predict
+        self.blocker = self._build_blocker()
+        # embedding storage, ANN index and query batching, see
+        # matchify.models.embedding_retrieval
+        self._init_retrieval(
+            ann_config=ann_config,
+            embedding_cache=embedding_cache,
+            query_batch_wait_ms=query_batch_wait_ms,
+            embedding_dtype=embedding_dtype,
+            rescore_k=rescore_k,
+            rescore_path=rescore_path,
+        )
+
+    def _cache_params(self) -> dict:
+        return {
+            **super()._cache_params(),
+            'base_model': self.base_model,
+            'n_pairs': self.n_pairs,
+            'epochs': self.epochs,
+            'batch_size': self.batch_size,
+            'margin': self.margin,
+        }
 
     def preprocess(self, df) -> pd.DataFrame:
         df = df.copy()
         for field, cfg in self.blocking_config.items():
             if cfg.get('method') == 'prefix':
                 prefix_len = cfg['threshold']
-                prefix_field = f"{field}_prefix_{prefix_len}"
-                self.blocking_config[field]['field'] = prefix_field
-                df[prefix_field] = df[field].fillna('').astype(str).str[:prefix_len]
+                for source, prefix_field in self._prefix_columns(field, cfg):
+                    df[prefix_field] = df[source].fillna('').astype(str).str[:prefix_len]
+        self._set_blocking_fields()
         return df
 
     def _record_text(self, record) -> str:
@@ -142,55 +174,13 @@ class SiameseMatchModel(ERBaseModel):
 
         # cache embeddings under the fine-tuned encoder
         texts = [self._record_text(row) for _, row in self.df.iterrows()]
-        self.embeddings = self.encoder.encode(
-            texts,
-            batch_size=self.batch_size,
-            convert_to_numpy=True,
-            show_progress_bar=False,
-            normalize_embeddings=True,
-        )
-
-    def _apply_blocking(self, record):
-        if not self.blocking_config or self.blocking_key is None:
-            return self.preprocessed_data.index
-        cfg = self.blocking_config[self.blocking_key]
-        method = cfg['method']
-        blocking_field = cfg['field']
-        key = self.preprocess(record.to_frame().T).iloc[0][blocking_field]
-        if method in ('prefix', 'block'):
-            return self.preprocessed_data[
-                self.preprocessed_data[blocking_field] == key
-            ].index
-        if method == 'full':
-            return self.preprocessed_data.index
-        raise ValueError(f"Unsupported blocking method: {method}")
-
-    def predict(self, record: pd.Series, **kwargs) -> pd.DataFrame:
-        if self.embeddings is None:
-            raise Exception('Call train() before predict()')
-        only_matches = kwargs.get('only_matches')
-        return_full_record = kwargs.get('return_full_record')
-
-        q_emb = self.encoder.encode(
-            [self._record_text(record)],
-            convert_to_numpy=True,
-            show_progress_bar=False,
-            normalize_embeddings=True,
-        )[0]
-
-        candidate_indices = self._apply_blocking(record)
-        positions = [self.df.index.get_loc(i) for i in candidate_indices]
-        scores = self.embeddings[positions] @ q_emb
-
-        results = pd.DataFrame({
-            'index': candidate_indices,
-            'score': scores,
-        }).sort_values(by='score', ascending=False).reset_index(drop=True)
-
-        records = self.df.loc[results['index']].reset_index(drop=True)
-        out = pd.concat([records, results[['score']]], axis=1)
-        if only_matches:
-            out = out[out['score'] >= 0.5]
-        if not return_full_record:
-            out = out[['id', 'score']]
-        return out
+        if self.embedding_cache is None:
+            embeddings = self._encode_texts(texts)
+        else:
+            # keyed by the fine-tuned weights, so a rerun that trains the
+            # same checkpoint reuses the stored rows
+            encoder_key = f"{self.base_model}@{encoder_state_hash(self.encoder)}"
+            embeddings = self.embedding_cache.get_or_encode(encoder_key, texts, self._encode_texts)
+        self.embeddings = self._store_embeddings(embeddings)
+        if self.ann_config:
+            self.ann_index = build_ann_index(self.embeddings, self.ann_config)
@@ -10,7 +10,21 @@ class EntityResolutionPipeline:
         self.splitter = splitter
         self.model = model
 
-    def run(self):
+    def run(self) -> pd.DataFrame:
+        """Train on the train split and rank candidates for every test and dev record.
+
+        Returns the long predict_many frame: one row per (query_id,
+        candidate_id) pair with score and rank, where query_id is the
+        record's index label. It no longer returns the concatenated
+        per-record predict frames.
+
+        candidate_id is a label of the frame the candidates were indexed
+        from. Models with a blocking index (flex, mlp, bert, siamese)
+        built it in their constructor, so that is model.preprocessed_data,
+        not the train split swapped into model.df here. ExactMatchModel
+        clusters model.df on its first query, so its candidates are
+        train-split labels.
+        """
         data = self.data_loader.load()
         self.splitter.data = data
         train_data, test_data, dev_data = self.splitter.split_er()
@@ -18,9 +32,6 @@ class EntityResolutionPipeline:
         self.model.df = train_data
         self.model.train()
 
-        preds = []
-        for split in (test_data, dev_data):
-            for _, record in split.iterrows():
-                preds.append(self.model.predict(record))
-
-        return pd.concat(preds, axis=0) if preds else pd.DataFrame()
+        # one batched ranking over test + dev instead of a predict per row
+        records = pd.concat([test_data, dev_data], axis=0)
+        return self.model.predict_many(records)
@@ -0,0 +1,160 @@
+"""
+Compact storage for the embedding models' record matrices.
+
+BertMatchModel and SiameseMatchModel keep one L2-normalized float32
+vector per record. embedding_dtype stores it smaller:
+
+    'float32'  the plain array, unchanged
+    'float16'  half precision, half the memory
+    'int8'     symmetric per-row quantization, round(v / scale) with
+               scale = max|v| / 127 kept as one float32 per row.
+               About a quarter of the memory.
+
+Scoring runs on the compact rows, a chunk at a time, so the full
+float32 matrix is never rebuilt in memory. Optionally the top
+candidates of each query are rescored exactly against a float32 copy
+memory-mapped from disk.
+"""
+import os
+import tempfile
+
+import numpy as np
+
+EMBEDDING_DTYPES = ('float32', 'float16', 'int8')
+# rows converted back to float32 per chunk while scoring
+_SCORE_CHUNK = 4096
+
+
+class QuantizedEmbeddings:
+    """
+    A float16 or int8 embedding matrix. Indexing returns float32 rows,
+    so it can stand in for the float32 array wherever rows are gathered
+    and scored.
+    """
+    def __init__(self, vectors, dtype):
+        if dtype not in ('float16', 'int8'):
+            raise ValueError(f"Unsupported quantized dtype: {dtype}")
+        vectors = np.asarray(vectors, dtype=np.float32)
+        self.dtype = dtype
+        if dtype == 'float16':
+            self.data = vectors.astype(np.float16)
+            self.scales = None
+        else:
+            peak = np.abs(vectors).max(axis=1) if len(vectors) else np.zeros(0, dtype=np.float32)
+            self.scales = np.where(peak > 0, peak / 127, 1).astype(np.float32)
+            self.data = np.rint(vectors / self.scales[:, None]).astype(np.int8)
+
+    def __len__(self):
+        return len(self.data)
+
+    @property
+    def shape(self):
+        return self.data.shape
+
+    @property
+    def nbytes(self) -> int:
+        return self.data.nbytes + (self.scales.nbytes if self.scales is not None else 0)
+
+    def __getitem__(self, rows) -> np.ndarray:
+        out = self.data[rows].astype(np.float32)
+        if self.scales is not None:
+            out *= self.scales[rows][..., None]
+        return out
+
+    def dequantize(self) -> np.ndarray:
+        return self[np.arange(len(self))]
+
+
+def quantize(vectors, dtype='float32'):
+    """vectors in the given embedding_dtype. 'float32' returns a plain float32 array."""
+    if dtype not in EMBEDDING_DTYPES:
+        raise ValueError(f"Unsupported embedding_dtype: {dtype}. Pick from: {', '.join(EMBEDDING_DTYPES)}")
+    if dtype == 'float32':
+        return np.asarray(vectors, dtype=np.float32)
+    return QuantizedEmbeddings(vectors, dtype)
+
+
+def score_rows(matrix, query, positions) -> np.ndarray:
+    """
+    Dot products of query with matrix[positions] as float32. Quantized
+    rows are expanded a chunk at a time.
+    """
+    positions = np.asarray(positions, dtype=np.int64)
+    query = np.asarray(query, dtype=np.float32)
+    if isinstance(matrix, np.ndarray):
+        return matrix[positions] @ query
+    scores = np.empty(len(positions), dtype=np.float32)
+    for start in range(0, len(positions), _SCORE_CHUNK):
+        chunk = positions[start:start + _SCORE_CHUNK]
+        scores[start:start + len(chunk)] = matrix[chunk] @ query
+    return scores
+
+
+class ExactCopy:
+    """
+    float32 copy of an embedding matrix on disk, memory-mapped read-only
+    on first use. Pickles as just the path, so evaluation workers map
+    the file themselves instead of receiving the whole matrix.
+
+    A copy written to a temp file is owned by the instance that wrote it
+    and deleted by close() or when that instance is garbage collected.
+    Pickled copies never own the file.
+    """
+    def __init__(self, path, owned=False):
+        self.path = path
+        self.owned = owned
+        self._matrix = None
+
+    def __getstate__(self):
+        return {'path': self.path, 'owned': False, '_matrix': None}
+
+    def __getitem__(self, rows) -> np.ndarray:
+        if self._matrix is None:
+            self._matrix = np.load(self.path, mmap_mode='r')
+        return np.asarray(self._matrix[rows])
+
+    def close(self):
+        self._matrix = None
+        if self.owned:
+            self.owned = False
+            try:
+                os.remove(self.path)
+            except OSError:
+                pass
+
+    def __del__(self):
+        self.close()
+
+
+def write_exact_copy(vectors, path=None) -> ExactCopy:
+    """
+    Save the float32 matrix to path for rescoring. Without a path it goes
+    to a temp file that the returned ExactCopy deletes on close().
+    """
+    owned = path is None
+    if owned:
+        fd, path = tempfile.mkstemp(prefix='matchify_embeddings_', suffix='.npy')
+        os.close(fd)
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    with open(path + '.tmp', 'wb') as f:
+        np.save(f, np.asarray(vectors, dtype=np.float32))
+    os.replace(path + '.tmp', path)
+    return ExactCopy(path, owned=owned)
+
+
+def rescore_top(scores, positions, query, exact, k) -> np.ndarray:
+    """
+    Replace the k best approximate scores with exact float32 scores from
+    exact (an ExactCopy). Rows are read in file order. Returns the
+    updated scores.
+    """
+    scores = np.array(scores, dtype=np.float32)
+    positions = np.asarray(positions, dtype=np.int64)
+    if not len(scores) or not k:
+        return scores
+    top = np.argpartition(-scores, min(k, len(scores)) - 1)[:k]
+    top = top[np.argsort(positions[top])]
+    scores[top] = exact[positions[top]] @ np.asarray(query, dtype=np.float32)
+    return scores
@@ -0,0 +1,243 @@
+"""
+Batched string-similarity kernels shared by the models.
+
+Every kernel scores many pairs per call instead of one pair per Python
+call:
+
+    one_to_many(query, candidates, method)    -> (n,) vector
+    many_to_many(queries, candidates, method) -> (m, n) matrix
+    paired(left, right, method)               -> (n,) vector, left[i] vs right[i]
+
+Jaro-Winkler and Levenshtein run through rapidfuzz's C++ batch scorers.
+They return exactly what jellyfish.jaro_winkler_similarity and
+textdistance.levenshtein.normalized_similarity return per pair. Jaccard
+tokenizes with the same gensim filters the models use.
+
+Results are float32 by default. The models ask for float64 so summed
+field scores stay bit-identical to the scalar path.
+"""
+import numpy as np
+from gensim.parsing.preprocessing import preprocess_string, strip_punctuation
+from rapidfuzz import process
+from rapidfuzz.distance import JaroWinkler, Levenshtein
+
+
+def tokenize(s: str) -> frozenset:
+    return frozenset(preprocess_string(s, filters=[strip_punctuation]))
+
+
+def jaccard(tokens_a: frozenset, tokens_b: frozenset) -> float:
+    union = len(tokens_a | tokens_b)
+    return float(len(tokens_a & tokens_b)) / float(union) if union else 0.0
+
+
+def _jaccard_scorer(s1, s2):
+    return jaccard(tokenize(s1), tokenize(s2))
+
+
+class TokenStore:
+    """
+    Interned token sets for one column, built once per dataset.
+
+    Every distinct token gets an int id. Row i's token set is the sorted,
+    deduplicated int32 slice tokens[offsets[i]:offsets[i + 1]] of one
+    flat array, instead of one Python set per row. Jaccard between a
+    query and a block of rows is a vectorized sorted-array intersection.
+    Scores are identical to jaccard() on the tokenize() sets.
+    """
+    def __init__(self, strings, tokenizer=tokenize):
+        self.tokenizer = tokenizer
+        self.vocab = {}
+        rows = []
+        for s in strings:
+            ids = [self.vocab.setdefault(token, len(self.vocab)) for token in tokenizer(s)]
+            rows.append(np.unique(np.asarray(ids, dtype=np.int32)))
+        self.lengths = np.array([len(r) for r in rows], dtype=np.int64)
+        self.offsets = np.concatenate(([0], np.cumsum(self.lengths))).astype(np.int64)
+        self.tokens = np.concatenate(rows).astype(np.int32) if rows else np.zeros(0, dtype=np.int32)
+        self._id_to_token = None
+
+    def __len__(self):
+        return len(self.lengths)
+
+    def row(self, i) -> np.ndarray:
+        return self.tokens[self.offsets[i]:self.offsets[i + 1]]
+
+    def token_set(self, i) -> frozenset:
+        """Row i's tokens as strings, the same set tokenize() gives."""
+        if self._id_to_token is None:
+            self._id_to_token = list(self.vocab)
+        return frozenset(self._id_to_token[t] for t in self.row(i))
+
+    def encode(self, s: str):
+        """
+        Query form of a string: (sorted ids of its in-vocabulary tokens,
+        total token count). Out-of-vocabulary tokens can't intersect any
+        row but still count toward the union.
+        """
+        tokens = self.tokenizer(s)
+        ids = [self.vocab[t] for t in tokens if t in self.vocab]
+        return np.unique(np.asarray(ids, dtype=np.int32)), len(tokens)
+
+    def encode_row(self, i):
+        row = self.row(i)
+        return row, len(row)
+
+    def _gather(self, positions):
+        # flat token ids of the given rows, plus which of them each id came from
+        positions = np.asarray(positions, dtype=np.int64)
+        lengths = self.lengths[positions]
+        segment = np.repeat(np.arange(len(positions)), lengths)
+        starts = np.repeat(self.offsets[positions], lengths)
+        within = np.arange(lengths.sum()) - np.repeat(np.cumsum(lengths) - lengths, lengths)
+        return self.tokens[starts + within], segment, lengths
+
+    def jaccard(self, query, positions) -> np.ndarray:
+        """Jaccard of one encoded query against every row in positions (float64)."""
+        query_ids, query_size = query
+        flat, segment, lengths = self._gather(positions)
+        if len(query_ids) and len(flat):
+            found = np.searchsorted(query_ids, flat)
+            hits = query_ids[np.minimum(found, len(query_ids) - 1)] == flat
+            intersection = np.bincount(segment[hits], minlength=len(lengths))
+        else:
+            intersection = np.zeros(len(lengths), dtype=np.int64)
+        return self._ratio(intersection, query_size + lengths - intersection)
+
+    def paired_jaccard(self, left, right) -> np.ndarray:
+        """Jaccard of row left[i] against row right[i] for every i (float64)."""
+        left_flat, left_segment, left_lengths = self._gather(left)
+        right_flat, right_segment, right_lengths = self._gather(right)
+        # each row's ids are unique, so a pair's intersection is how many
+        # ids show up in both halves of its concatenation
+        segment = np.concatenate((left_segment, right_segment)).astype(np.int64)
+        keys = segment * max(len(self.vocab), 1) + np.concatenate((left_flat, right_flat))
+        unique_segments = np.unique(keys) // max(len(self.vocab), 1)
+        distinct = np.bincount(unique_segments, minlength=len(left_lengths))
+        intersection = left_lengths + right_lengths - distinct
+        return self._ratio(intersection, distinct)
+
+    @staticmethod
+    def _ratio(intersection, union) -> np.ndarray:
+        out = np.zeros(len(union))
+        nonzero = union > 0
+        out[nonzero] = intersection[nonzero] / union[nonzero]
+        return out
+
+
+class Kernel:
+    """
+    One registered similarity method. scorer(s1, s2) scores a single pair.
+    batched marks scorers rapidfuzz can run natively over whole arrays.
+    The others are looped in Python.
+
+    empty_score overrides the score of two empty strings, for scorers
+    whose convention differs from the function they replace (jellyfish
+    scores '' vs '' as 0, rapidfuzz as 1).
+    """
+    def __init__(self, name, scorer, batched, empty_score=None):
+        self.name = name
+        self.scorer = scorer
+        self.batched = batched
+        self.empty_score = empty_score
+
+    def score(self, s1, s2) -> float:
+        if self.empty_score is not None and not s1 and not s2:
+            return self.empty_score
+        return float(self.scorer(s1, s2))
+
+    def one_to_many(self, query, candidates, dtype=np.float32) -> np.ndarray:
+        return self.many_to_many([query], candidates, dtype=dtype)[0]
+
+    def many_to_many(self, queries, candidates, dtype=np.float32) -> np.ndarray:
+        queries, candidates = list(queries), list(candidates)
+        if not queries or not candidates:
+            return np.zeros((len(queries), len(candidates)), dtype=dtype)
+        if self.batched:
+            out = process.cdist(queries, candidates, scorer=self.scorer, dtype=dtype)
+            if self.empty_score is not None:
+                empty_q = np.array([not q for q in queries])
+                empty_c = np.array([not c for c in candidates])
+                out[np.ix_(empty_q, empty_c)] = self.empty_score
+            return out
+        out = np.empty((len(queries), len(candidates)), dtype=dtype)
+        for i, query in enumerate(queries):
+            out[i] = [self.scorer(query, candidate) for candidate in candidates]
+        return out
+
+    def paired(self, left, right, dtype=np.float32) -> np.ndarray:
+        left, right = list(left), list(right)
+        if len(left) != len(right):
+            raise ValueError(f"paired needs equal lengths, got {len(left)} and {len(right)}")
+        if not left:
+            return np.zeros(0, dtype=dtype)
+        if self.batched:
+            out = process.cpdist(left, right, scorer=self.scorer, dtype=dtype)
+            if self.empty_score is not None:
+                out[[not a and not b for a, b in zip(left, right)]] = self.empty_score
+            return out
+        return np.fromiter(
+            (self.scorer(a, b) for a, b in zip(left, right)), dtype=dtype, count=len(left)
+        )
+
+
+class JaccardKernel(Kernel):
+    """Token-set Jaccard. Each distinct string is tokenized once per call, not once per pair."""
+    def __init__(self, name):
+        super().__init__(name, _jaccard_scorer, batched=False)
+
+    def many_to_many(self, queries, candidates, dtype=np.float32) -> np.ndarray:
+        query_tokens = [tokenize(q) for q in queries]
+        candidate_tokens = [tokenize(c) for c in candidates]
+        out = np.empty((len(query_tokens), len(candidate_tokens)), dtype=dtype)
+        for i, tokens in enumerate(query_tokens):
+            out[i] = [jaccard(tokens, other) for other in candidate_tokens]
+        return out
+
+    def paired(self, left, right, dtype=np.float32) -> np.ndarray:
+        left, right = list(left), list(right)
+        if len(left) != len(right):
+            raise ValueError(f"paired needs equal lengths, got {len(left)} and {len(right)}")
+        tokens = {s: tokenize(s) for s in set(left) | set(right)}
+        return np.fromiter(
+            (jaccard(tokens[a], tokens[b]) for a, b in zip(left, right)), dtype=dtype, count=len(left)
+        )
+
+
+KERNELS = {}
+
+
+def register(kernel, aliases=()):
+    """Register a Kernel under its name (and any aliases)."""
+    for key in (kernel.name, *aliases):
+        KERNELS[key] = kernel
+    return kernel
+
+
+register(Kernel('jaro_winkler', JaroWinkler.normalized_similarity, batched=True, empty_score=0.0))
+register(Kernel('levenshtein', Levenshtein.normalized_similarity, batched=True))
+register(JaccardKernel('jaccard'), aliases=('jaccard_similarity',))
+
+
+def get_kernel(method) -> Kernel:
+    try:
+        return KERNELS[method]
+    except KeyError:
+        raise ValueError(f"Unsupported comparison method: {method}")
+
+
+def similarity(s1: str, s2: str, method: str) -> float:
+    """Score a single pair with the registered method."""
+    return get_kernel(method).score(s1, s2)
+
+
+def one_to_many(query: str, candidates, method: str, dtype=np.float32) -> np.ndarray:
+    return get_kernel(method).one_to_many(query, candidates, dtype=dtype)
+
+
+def many_to_many(queries, candidates, method: str, dtype=np.float32) -> np.ndarray:
+    return get_kernel(method).many_to_many(queries, candidates, dtype=dtype)
+
+
+def paired(left, right, method: str, dtype=np.float32) -> np.ndarray:
+    return get_kernel(method).paired(left, right, dtype=dtype)
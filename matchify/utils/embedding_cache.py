@@ -0,0 +1,189 @@
+import hashlib
+import json
+import os
+
+import numpy as np
+
+
+def text_key(text: str) -> str:
+    return hashlib.sha256(text.encode('utf-8')).hexdigest()
+
+
+def encoder_state_hash(encoder) -> str:
+    """Content hash of a torch encoder's weights, for fine-tuned checkpoints."""
+    h = hashlib.sha256()
+    for name, tensor in sorted(encoder.state_dict().items()):
+        h.update(name.encode())
+        h.update(tensor.detach().cpu().numpy().tobytes())
+    return h.hexdigest()
+
+
+class EmbeddingCache:
+    """
+    Opt-in on-disk cache for record embeddings, content-addressed by
+    (encoder key, record text).
+
+    Each encoder key (a model name, or a model name plus the hash of a
+    fine-tuned checkpoint) gets one namespace directory holding
+    embeddings.npy, a float32 (capacity, dim) matrix opened as a memmap,
+    and index.json, which maps the sha256 of each cached text to its row
+    and a last-used tick. A lookup only reads the rows it needs and only
+    the texts with no row are encoded, so repeat runs and new processes
+    skip everything they have seen before.
+
+    With max_entries set, each namespace keeps at most that many texts.
+    The least recently used rows are evicted and their slots reused.
+    Writes are atomic (temp file plus rename) but there is no locking, so
+    one process should write a namespace at a time.
+    """
+    FORMAT_VERSION = 1
+    # rows added per growth step at minimum
+    MIN_GROWTH = 1024
+
+    def __init__(self, cache_dir, max_entries=None):
+        """
+        Parameters:
+            cache_dir (str): directory the namespaces are written to. Created on first store.
+            max_entries (int): per-namespace cap on cached texts. None means unbounded.
+        """
+        self.cache_dir = cache_dir
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def _namespace_dir(self, encoder_key) -> str:
+        return os.path.join(self.cache_dir, hashlib.sha256(encoder_key.encode()).hexdigest()[:16])
+
+    def _load_index(self, namespace_dir, encoder_key) -> dict:
+        path = os.path.join(namespace_dir, 'index.json')
+        if os.path.isfile(path):
+            with open(path) as f:
+                index = json.load(f)
+            if index.get('format') == self.FORMAT_VERSION and index.get('encoder_key') == encoder_key:
+                return index
+        return {
+            'format': self.FORMAT_VERSION, 'encoder_key': encoder_key, 'dim': None,
+            'capacity': 0, 'size': 0, 'clock': 0, 'entries': {}, 'free': [],
+        }
+
+    def get_or_encode(self, encoder_key, texts, encode) -> np.ndarray:
+        """
+        Embeddings for texts, shape (len(texts), dim). Cached rows are read
+        from disk. The rest go through encode(list of texts) in one call
+        and are stored.
+        """
+        texts = list(texts)
+        namespace_dir = self._namespace_dir(encoder_key)
+        index = self._load_index(namespace_dir, encoder_key)
+        entries = index['entries']
+        keys = [text_key(t) for t in texts]
+        index['clock'] += 1
+        tick = index['clock']
+
+        # distinct missing texts, each encoded once
+        missing = {}
+        for key, text in zip(keys, texts):
+            if key not in entries and key not in missing:
+                missing[key] = text
+        n_missing = sum(1 for key in keys if key in missing)
+        self.misses += n_missing
+        self.hits += len(keys) - n_missing
+
+        encoded = {}
+        if missing:
+            vectors = np.asarray(encode(list(missing.values())), dtype=np.float32)
+            encoded = dict(zip(missing, vectors))
+
+        dim = index['dim'] or (len(next(iter(encoded.values()))) if encoded else 0)
+        out = np.empty((len(texts), dim), dtype=np.float32)
+        hit_rows = [(i, entries[key][0]) for i, key in enumerate(keys) if key in entries]
+        if hit_rows:
+            stored = np.load(os.path.join(namespace_dir, 'embeddings.npy'), mmap_mode='r')
+            out_rows, slots = zip(*hit_rows)
+            order = np.argsort(slots)
+            # read rows in file order, then scatter them back
+            out[np.asarray(out_rows)[order]] = stored[np.asarray(slots)[order]]
+            del stored
+        for i, key in enumerate(keys):
+            if key in encoded:
+                out[i] = encoded[key]
+            entry = entries.get(key)
+            if entry is not None:
+                entry[1] = tick
+
+        if encoded:
+            self._store(namespace_dir, index, encoded, tick)
+        elif texts:
+            self._write_index(namespace_dir, index)
+        return out
+
+    def _store(self, namespace_dir, index, encoded, tick):
+        entries = index['entries']
+        dim = len(next(iter(encoded.values())))
+        if index['dim'] is None:
+            index['dim'] = dim
+        elif index['dim'] != dim:
+            raise ValueError(f"Embedding dim {dim} doesn't match the cached dim {index['dim']}")
+
+        new_keys = list(encoded)
+        if self.max_entries is not None:
+            # never evict rows this call just used, and store at most
+            # max_entries new ones
+            new_keys = new_keys[:self.max_entries]
+            overflow = len(entries) + len(new_keys) - self.max_entries
+            if overflow > 0:
+                stale = sorted((e[1], key) for key, e in entries.items() if e[1] < tick)
+                for _, key in stale[:overflow]:
+                    index['free'].append(entries.pop(key)[0])
+                    self.evictions += 1
+                new_keys = new_keys[:max(0, self.max_entries - len(entries))]
+        if not new_keys:
+            self._write_index(namespace_dir, index)
+            return
+
+        # evicted slots first, then slots past the high-water mark
+        free = sorted(index['free'])
+        slots = free[:len(new_keys)]
+        index['free'] = free[len(new_keys):]
+        fresh = len(new_keys) - len(slots)
+        slots += list(range(index['size'], index['size'] + fresh))
+        index['size'] += fresh
+        self._ensure_capacity(namespace_dir, index, index['size'], dim)
+
+        stored = np.load(os.path.join(namespace_dir, 'embeddings.npy'), mmap_mode='r+')
+        stored[np.asarray(slots)] = np.stack([encoded[key] for key in new_keys])
+        stored.flush()
+        del stored
+        for key, slot in zip(new_keys, slots):
+            entries[key] = [slot, tick]
+        # rows are on disk before the index points at them
+        self._write_index(namespace_dir, index)
+
+    def _ensure_capacity(self, namespace_dir, index, rows, dim):
+        if rows <= index['capacity']:
+            return
+        os.makedirs(namespace_dir, exist_ok=True)
+        path = os.path.join(namespace_dir, 'embeddings.npy')
+        capacity = max(rows, 2 * index['capacity'], self.MIN_GROWTH)
+        if self.max_entries is not None:
+            capacity = max(rows, min(capacity, self.max_entries))
+        grown = np.lib.format.open_memmap(path + '.tmp', mode='w+', dtype=np.float32, shape=(capacity, dim))
+        if index['capacity']:
+            old = np.load(path, mmap_mode='r')
+            grown[:len(old)] = old
+            del old
+        grown.flush()
+        del grown
+        os.replace(path + '.tmp', path)
+        index['capacity'] = capacity
+
+    def _write_index(self, namespace_dir, index):
+        os.makedirs(namespace_dir, exist_ok=True)
+        path = os.path.join(namespace_dir, 'index.json')
+        with open(path + '.tmp', 'w') as f:
+            json.dump(index, f)
+        os.replace(path + '.tmp', path)
+
+    def summary(self) -> str:
+        return f"{self.hits} hits, {self.misses} misses, {self.evictions} evictions"
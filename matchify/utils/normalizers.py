@@ -0,0 +1,250 @@
+"""
+Field normalizers with a bounded, process-wide memo cache.
+
+nameparser, phonenumbers, usaddress and dateutil are slow per call, and
+real data repeats the same names, phones, addresses and dates heavily.
+Each normalizer gets its own LRU cache keyed by the raw string value.
+The caches live at module level, so every model in the process (and
+every model built on the same dataset) shares them.
+"""
+import functools
+import threading
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+
+import nameparser
+import numpy as np
+import pandas as pd
+import phonenumbers
+import usaddress
+from dateutil import parser as date_parser
+
+DEFAULT_CACHE_SIZE = 100_000
+# below this many values a process pool costs more than it saves
+PARALLEL_MIN_ROWS = 20_000
+
+
+def normalize_name(name: str) -> str:
+    # .lower() goes on the string, not on the HumanName instance
+    return str(nameparser.HumanName(name)).lower()
+
+
+def normalize_phone(phone: str) -> str:
+    # phonenumbers.parse needs a region for non-international numbers.
+    # default to US so "(555) 123-4567" works. fall back to digits.
+    try:
+        parsed_phone = phonenumbers.parse(phone, "US")
+        return phonenumbers.format_number(parsed_phone, phonenumbers.PhoneNumberFormat.E164)
+    except phonenumbers.NumberParseException:
+        digits = "".join(ch for ch in str(phone) if ch.isdigit())
+        return digits
+
+
+def normalize_address(address: str) -> str:
+    try:
+        parsed_address, _ = usaddress.tag(address)
+        return " ".join(parsed_address.values()).lower()
+    except Exception:
+        return ""
+
+
+def normalize_date(date: str) -> str:
+    try:
+        return date_parser.parse(date).strftime("%Y-%m-%d")
+    except (ValueError, TypeError):
+        return ""
+
+
+NORMALIZERS = {
+    'name': normalize_name,
+    'phone': normalize_phone,
+    'address': normalize_address,
+    'date': normalize_date,
+}
+
+
+class NormalizerCache:
+    """
+    Bounded LRU memo for one normalizer. Only str values are cached;
+    anything else (NaN, None, numbers) is passed straight through, since
+    those are cheap and NaN never compares equal to itself as a key.
+
+    maxsize=0 disables caching. hits, misses and evictions count lookups
+    since the last clear().
+    """
+    def __init__(self, func, maxsize=DEFAULT_CACHE_SIZE):
+        self.func = func
+        self.maxsize = maxsize
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def __len__(self):
+        return len(self._entries)
+
+    def __call__(self, value):
+        if not isinstance(value, str) or not self.maxsize:
+            return self.func(value)
+        with self._lock:
+            if value in self._entries:
+                self._entries.move_to_end(value)
+                self.hits += 1
+                return self._entries[value]
+        result = self.func(value)
+        with self._lock:
+            self.misses += 1
+            self._entries[value] = result
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+        return result
+
+    def resize(self, maxsize):
+        with self._lock:
+            self.maxsize = maxsize
+            while len(self._entries) > max(maxsize, 0):
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.hits = self.misses = self.evictions = 0
+
+    def stats(self) -> dict:
+        return {
+            'size': len(self._entries),
+            'maxsize': self.maxsize,
+            'hits': self.hits,
+            'misses': self.misses,
+            'evictions': self.evictions,
+        }
+
+
+_CACHES = {kind: NormalizerCache(func) for kind, func in NORMALIZERS.items()}
+
+
+def normalize(kind: str, value) -> str:
+    """Normalize one value with the cached normalizer for kind ('name', 'phone', 'address', 'date')."""
+    return _CACHES[kind](value)
+
+
+def set_cache_size(maxsize, kind=None):
+    """Resize one normalizer's cache, or every cache when kind is None. 0 disables caching."""
+    for cache_kind, cache in _CACHES.items():
+        if kind is None or cache_kind == kind:
+            cache.resize(maxsize)
+
+
+def clear_caches():
+    for cache in _CACHES.values():
+        cache.clear()
+
+
+def cache_stats() -> dict:
+    """Per-normalizer size, maxsize, hits, misses and evictions."""
+    return {kind: cache.stats() for kind, cache in _CACHES.items()}
+
+
+# vectorized fast paths for the common formats. each takes a column of
+# str values and returns the normalized value where it applies and NaN
+# where the value has to go through the per-value library normalizer.
+# output on the fast path is identical to the library's.
+
+# plain NANP numbers: optional +1/1 country prefix, area code 2-9, and
+# (), space, dot or dash separators. phonenumbers formats these as +1
+# followed by the ten digits.
+_PHONE_PATTERN = r'(?:\+?1[\s.\-]?)?\(?([2-9]\d{2})\)?[\s.\-]?(\d{3})[\s.\-]?(\d{4})'
+# 1900-2099 only, where dateutil's and pandas' %Y output agree
+_ISO_DATE_PATTERN = r'(?:19|20)\d{2}-\d{2}-\d{2}'
+_US_DATE_PATTERN = r'\d{1,2}/\d{1,2}/(?:19|20)\d{2}'
+# one or two purely alphabetic tokens
+_NAME_PATTERN = r'\s*([^\W\d_]+)(?:\s+([^\W\d_]+))?\s*'
+
+
+def _fast_phone(strings: pd.Series) -> pd.Series:
+    parts = strings.str.fullmatch(_PHONE_PATTERN, na=False)
+    digits = strings.where(parts).str.extract(_PHONE_PATTERN)
+    return '+1' + digits[0] + digits[1] + digits[2]
+
+
+def _fast_date(strings: pd.Series) -> pd.Series:
+    out = pd.Series(float('nan'), index=strings.index, dtype=object)
+    for pattern, fmt in ((_ISO_DATE_PATTERN, '%Y-%m-%d'), (_US_DATE_PATTERN, '%m/%d/%Y')):
+        matched = strings.str.fullmatch(pattern, na=False)
+        if matched.any():
+            # invalid dates (02/30, month 13) come back NaT and fall back
+            parsed = pd.to_datetime(strings[matched], format=fmt, errors='coerce')
+            formatted = parsed.dt.strftime('%Y-%m-%d')
+            out[formatted.index] = formatted.where(parsed.notna()).astype(object)
+    return out
+
+
+@functools.cache
+def _special_name_tokens() -> frozenset:
+    # tokens nameparser treats specially (titles, suffixes, prefixes,
+    # conjunctions). names containing one always take the library path.
+    from nameparser.config import CONSTANTS
+    return frozenset().union(
+        CONSTANTS.titles, CONSTANTS.suffix_acronyms, CONSTANTS.suffix_not_acronyms,
+        CONSTANTS.prefixes, CONSTANTS.conjunctions, CONSTANTS.first_name_titles,
+    )
+
+
+def _name_excluded(tokens: pd.Series) -> pd.Series:
+    return tokens.str.lower().isin(_special_name_tokens())
+
+
+def _fast_name(strings: pd.Series) -> pd.Series:
+    tokens = strings.where(strings.str.fullmatch(_NAME_PATTERN, na=False)).str.extract(_NAME_PATTERN)
+    first, last = tokens[0], tokens[1]
+    simple = first.notna() & ~_name_excluded(first) & ~(last.notna() & _name_excluded(last))
+    names = first.where(last.isna(), first + ' ' + last).str.lower()
+    return names.where(simple)
+
+
+_FAST_PATHS = {
+    'name': _fast_name,
+    'phone': _fast_phone,
+    'date': _fast_date,
+}
+
+
+def _normalize_chunk(kind, values):
+    return [normalize(kind, v) for v in values]
+
+
+def normalize_column(kind: str, column: pd.Series, n_jobs: int = 1,
+                     min_parallel_rows: int = PARALLEL_MIN_ROWS) -> pd.Series:
+    """
+    Normalize a whole column. Values in the common formats for the kind
+    are handled by a vectorized fast path. Everything else goes through
+    the cached per-value normalizer. With n_jobs > 1 and at least
+    min_parallel_rows values left over, those are split into chunks,
+    normalized in worker processes (each with its own cache) and
+    reassembled in order. Smaller columns take the serial path.
+    """
+    values = column.to_numpy(dtype=object, copy=True)
+    pending = np.arange(len(values))
+    if kind in _FAST_PATHS and len(values):
+        is_str = np.fromiter((isinstance(v, str) for v in values), dtype=bool, count=len(values))
+        fast = _FAST_PATHS[kind](pd.Series(values, dtype=object).where(is_str))
+        handled = fast.notna().to_numpy()
+        values[handled] = fast.to_numpy(dtype=object)[handled]
+        pending = np.flatnonzero(~handled)
+
+    rest = values[pending].tolist()
+    if n_jobs <= 1 or len(rest) < min_parallel_rows:
+        normalized = [_CACHES[kind](v) for v in rest]
+    else:
+        # a few chunks per worker so one slow chunk doesn't hold up the pool
+        chunk_size = -(-len(rest) // (n_jobs * 4))
+        chunks = [rest[i:i + chunk_size] for i in range(0, len(rest), chunk_size)]
+        with ProcessPoolExecutor(max_workers=n_jobs) as pool:
+            results = pool.map(_normalize_chunk, [kind] * len(chunks), chunks)
+            normalized = [value for chunk in results for value in chunk]
+    if len(pending):
+        values[pending] = pd.array(normalized, dtype=object)
+    return pd.Series(values, index=column.index, name=column.name)
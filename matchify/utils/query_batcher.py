@@ -0,0 +1,102 @@
+import threading
+import time
+
+
+class _Request:
+    __slots__ = ('text', 'arrived', 'result', 'error', 'done')
+
+    def __init__(self, text):
+        self.text = text
+        self.arrived = time.monotonic()
+        self.result = None
+        self.error = None
+        self.done = False
+
+
+class QueryBatcher:
+    """
+    Thread-safe micro-batcher for single-text encode calls.
+
+    encode(text) queues the text and blocks until its vector is ready.
+    Requests are collected until max_batch_size are waiting or the
+    oldest has waited wait_ms, then one of the waiting callers runs
+    encode_batch on the whole batch and hands every caller its row.
+    Concurrent predict calls share one transformer forward pass instead
+    of running a batch of one each. Only one batch is encoded at a time,
+    so encode_batch doesn't need to be thread-safe itself.
+
+    There is no background thread. A lone caller pays at most wait_ms
+    extra latency.
+    """
+    def __init__(self, encode_batch, max_batch_size=64, wait_ms=2.0):
+        """
+        Parameters:
+            encode_batch (callable): list of texts -> (n, dim) array.
+            max_batch_size (int): encode as soon as this many requests are queued.
+            wait_ms (float): how long the oldest queued request waits for company.
+        """
+        self.encode_batch = encode_batch
+        self.max_batch_size = max_batch_size
+        self.wait_ms = wait_ms
+        self.batches = 0
+        self.requests = 0
+        self._init_state()
+
+    def _init_state(self):
+        self._cond = threading.Condition()
+        self._pending = []
+        self._busy = False
+
+    def __getstate__(self):
+        # locks don't pickle. a copy starts with an empty queue.
+        state = self.__dict__.copy()
+        for name in ('_cond', '_pending', '_busy'):
+            del state[name]
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self._init_state()
+
+    def encode(self, text):
+        request = _Request(text)
+        with self._cond:
+            self._pending.append(request)
+            self._cond.notify_all()
+            while not request.done:
+                timeout = None
+                if not self._busy and self._pending:
+                    timeout = self._pending[0].arrived + self.wait_ms / 1000 - time.monotonic()
+                    if len(self._pending) >= self.max_batch_size or timeout <= 0:
+                        self._run_batch()
+                        continue
+                self._cond.wait(timeout)
+        if request.error is not None:
+            raise request.error
+        return request.result
+
+    def _run_batch(self):
+        # called with the lock held. the encode itself runs unlocked so
+        # new requests can queue up for the next batch meanwhile.
+        batch = self._pending[:self.max_batch_size]
+        del self._pending[:self.max_batch_size]
+        self._busy = True
+        self._cond.release()
+        vectors, error = None, None
+        try:
+            vectors = self.encode_batch([r.text for r in batch])
+        except Exception as e:
+            error = e
+        finally:
+            self._cond.acquire()
+        for i, request in enumerate(batch):
+            request.result = vectors[i] if error is None else None
+            request.error = error
+            request.done = True
+        self._busy = False
+        self.batches += 1
+        self.requests += len(batch)
+        self._cond.notify_all()
+
+    def mean_batch_size(self) -> float:
+        return self.requests / self.batches if self.batches else 0.0
@@ -0,0 +1,101 @@
+import hashlib
+import json
+import os
+
+import pandas as pd
+
+import matchify
+
+
+class ScoreCache:
+    """
+    Opt-in on-disk cache for evaluation rankings.
+
+    Each (dataset, model class, seed) gets one slot directory holding the
+    eval ranking as a parquet file (query_id, candidate_id, score, rank)
+    plus a meta.json with the key it was computed under. The key hashes
+    the dataset contents, field_config, blocking_config, model class,
+    hyperparameters, seed and the matchify version, so any change to
+    those invalidates the slot and it is recomputed and overwritten.
+    """
+    FORMAT_VERSION = 1
+
+    def __init__(self, cache_dir):
+        """
+        Parameters:
+            cache_dir (str): directory the slots are written to. Created on first store.
+        """
+        self.cache_dir = cache_dir
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+        self.last_status = None
+
+    @staticmethod
+    def key_for(model) -> str:
+        """Content hash of everything that can change the model's eval ranking."""
+        h = hashlib.sha256()
+        h.update(model._dataset_fingerprint().encode())
+        params = {
+            'format': ScoreCache.FORMAT_VERSION,
+            'matchify': matchify.__version__,
+            **model._cache_params(),
+        }
+        h.update(json.dumps(params, sort_keys=True, default=str).encode())
+        return h.hexdigest()
+
+    def _slot_dir(self, name, model) -> str:
+        slot = f"{type(model).__name__}-seed{model.random_state}"
+        return os.path.join(self.cache_dir, name, slot) if name else os.path.join(self.cache_dir, slot)
+
+    def load(self, model, name=None):
+        """
+        Return the cached ranking for model, or None on a miss.
+
+        A slot whose stored key doesn't match the model's current key
+        counts as an invalidation rather than a plain miss.
+        """
+        slot_dir = self._slot_dir(name, model)
+        meta_path = os.path.join(slot_dir, 'meta.json')
+        ranking_path = os.path.join(slot_dir, 'ranking.parquet')
+        if not os.path.isfile(meta_path) or not os.path.isfile(ranking_path):
+            self.misses += 1
+            self.last_status = 'miss'
+            return None
+
+        with open(meta_path) as f:
+            meta = json.load(f)
+        if meta.get('key') != self.key_for(model):
+            self.invalidations += 1
+            self.last_status = 'invalidated'
+            return None
+
+        self.hits += 1
+        self.last_status = 'hit'
+        return pd.read_parquet(ranking_path)
+
+    def store(self, model, ranking: pd.DataFrame, name=None):
+        slot_dir = self._slot_dir(name, model)
+        os.makedirs(slot_dir, exist_ok=True)
+        # meta.json is what makes a slot valid. drop the old one before
+        # replacing the parquet and write the new one last, so a run
+        # interrupted anywhere in between leaves a miss, never an old key
+        # next to a new ranking. both files go through temp names.
+        meta_path = os.path.join(slot_dir, 'meta.json')
+        if os.path.exists(meta_path):
+            os.remove(meta_path)
+        ranking_path = os.path.join(slot_dir, 'ranking.parquet')
+        ranking.to_parquet(ranking_path + '.tmp', index=False)
+        os.replace(ranking_path + '.tmp', ranking_path)
+        meta = {
+            'key': self.key_for(model),
+            'model': type(model).__name__,
+            'random_state': model.random_state,
+            'rows': len(ranking),
+        }
+        with open(meta_path + '.tmp', 'w') as f:
+            json.dump(meta, f, indent=2)
+        os.replace(meta_path + '.tmp', meta_path)
+
+    def summary(self) -> str:
+        return f"{self.hits} hits, {self.misses} misses, {self.invalidations} invalidations"
@@ -15,6 +15,7 @@ setup(
         'textdistance',
         'jellyfish',
         'python-Levenshtein',
+        'rapidfuzz',
         'gensim',
         'nameparser',
         'phonenumbers',
@@ -37,6 +38,10 @@ setup(
             'datasets',
             'accelerate>=0.20',
         ],
+        # optional faiss backend for the ANN index (matchify.ann)
+        'ann': [
+            'faiss-cpu>=1.7',
+        ],
         'dev': [
             'pytest>=7.0',
             'ruff>=0.0.260',
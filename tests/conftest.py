@@ -66,3 +66,21 @@ def amazon_google_blocking_config():
 @pytest.fixture
 def amazon_google_ignored():
     return ["id", "group_id", "original_id"]
+
+
+@pytest.fixture
+def trained_model(amazon_google_ignored, amazon_google_field_config, amazon_google_blocking_config):
+    """Factory for a trained model on the Amazon-Google configs, built the way the CLI builds it."""
+    from matchify.cli import _build_model
+
+    def build(model_name, df, eval_batch_size=None, **kwargs):
+        model = _build_model(
+            model_name, df, amazon_google_ignored,
+            amazon_google_field_config, amazon_google_blocking_config, **kwargs,
+        )
+        if eval_batch_size is not None:
+            model.eval_batch_size = eval_batch_size
+        model.train()
+        return model
+
+    return build
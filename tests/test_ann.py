@@ -0,0 +1,77 @@
+"""Tests for the ANN index over embedding matrices."""
+import numpy as np
+import pytest
+
+from matchify.ann import IVFFlatIndex, build_ann_index
+
+
+def _clustered(n=2000, dim=16, seed=0):
+    rng = np.random.default_rng(seed)
+    centers = rng.normal(size=(20, dim))
+    vectors = centers[rng.integers(0, 20, n)] + 0.3 * rng.normal(size=(n, dim))
+    return (vectors / np.linalg.norm(vectors, axis=1, keepdims=True)).astype(np.float32)
+
+
+def test_ivf_full_probe_is_exact():
+    vectors = _clustered()
+    index = IVFFlatIndex(vectors, nlist=16)
+    queries = vectors[:20]
+    scores, positions = index.search(queries, 5, nprobe=16)
+    exact = queries @ vectors.T
+    expected = np.sort(exact, axis=1)[:, ::-1][:, :5]
+    assert np.allclose(scores, expected, atol=1e-5)
+    assert np.allclose(np.take_along_axis(exact, positions, axis=1), scores, atol=1e-5)
+
+
+def test_ivf_recall_grows_with_nprobe():
+    vectors = _clustered()
+    index = IVFFlatIndex(vectors, nlist=32)
+    queries = vectors[:50]
+    exact = np.argsort(-(queries @ vectors.T), axis=1)[:, :10]
+
+    def recall(nprobe):
+        _, positions = index.search(queries, 10, nprobe=nprobe)
+        return np.mean([len(set(a) & set(b)) / 10 for a, b in zip(positions, exact)])
+
+    assert recall(1) <= recall(4) <= recall(32) == 1.0
+
+
+def test_ivf_pads_short_results():
+    vectors = _clustered(n=6)
+    scores, positions = IVFFlatIndex(vectors, nlist=2).search(vectors[:1], 10, nprobe=2)
+    assert list(positions[0, 6:]) == [-1] * 4
+    assert np.isneginf(scores[0, 6:]).all()
+    assert sorted(positions[0, :6]) == list(range(6))
+
+
+def test_ivf_index_path_round_trip(tmp_path):
+    vectors = _clustered()
+    path = str(tmp_path / "ann" / "index.npz")
+    built = IVFFlatIndex(vectors, nlist=16, index_path=path)
+    loaded = IVFFlatIndex(vectors, nlist=16, index_path=path)
+    assert np.array_equal(built.centroids, loaded.centroids)
+    assert np.array_equal(built.cell_positions, loaded.cell_positions)
+    # different vectors don't match the stored fingerprint and are rebuilt
+    other = IVFFlatIndex(vectors[::-1].copy(), nlist=16, index_path=path)
+    assert not np.array_equal(other.cell_positions, built.cell_positions)
+
+
+def test_ivf_index_path_over_quantized_rows(tmp_path):
+    from matchify import ann, quantization
+
+    vectors = _clustered()
+    path = str(tmp_path / "index.npz")
+    built = IVFFlatIndex(quantization.quantize(vectors, "int8"), nlist=16, index_path=path)
+    loaded = IVFFlatIndex(quantization.quantize(vectors, "int8"), nlist=16, index_path=path)
+    assert np.array_equal(built.cell_positions, loaded.cell_positions)
+    # the stored dtype is part of the fingerprint
+    assert ann._fingerprint(quantization.quantize(vectors, "int8"), ()) != ann._fingerprint(
+        quantization.quantize(vectors, "float16"), ()
+    )
+
+
+def test_build_ann_index_backends():
+    vectors = _clustered(n=200)
+    assert isinstance(build_ann_index(vectors, {"backend": "numpy", "nlist": 4}), IVFFlatIndex)
+    with pytest.raises(ValueError):
+        build_ann_index(vectors, {"backend": "hnsw"})
@@ -0,0 +1,136 @@
+"""Tests for the prebuilt blocking indexes."""
+import numpy as np
+import pandas as pd
+
+from matchify.blocking import KeyIndex
+
+
+def test_key_index_matches_column_scan():
+    keys = pd.Series(["ab", "cd", "ab", None, "ef", "ab", "cd"])
+    index = KeyIndex(keys)
+    for key in ["ab", "cd", "ef", "zz"]:
+        expected = np.flatnonzero((keys == key).to_numpy())
+        assert list(index.lookup(key)) == list(expected)
+    # missing keys are never indexed
+    assert len(index.lookup(None)) == 0
+    assert len(index.lookup(float("nan"))) == 0
+    assert len(index) == 3
+
+
+def test_sorted_neighborhood_fixed_window_matches_sort_and_slice():
+    from matchify.blocking import SortedNeighborhoodIndex
+
+    rng = np.random.default_rng(0)
+    keys = pd.Series(["".join(rng.choice(list("abcdef"), 4)) for _ in range(200)]).drop_duplicates()
+    keys = keys.reset_index(drop=True)
+    index = SortedNeighborhoodIndex(keys, threshold=3)
+    sorted_keys = keys.sort_values()
+    for query in ["aaaa", "cafe", "ffff", "bead"]:
+        pos = sorted_keys.searchsorted(query)
+        expected = sorted_keys.iloc[max(0, pos - 3): pos + 3].index
+        assert list(index.lookup(query)) == list(expected)
+
+
+def test_sorted_neighborhood_adaptive_window_tracks_key_density():
+    from matchify.blocking import SortedNeighborhoodIndex
+
+    # 40 keys starting "sm", a handful of sparse ones elsewhere
+    dense = [f"sm{i:03d}" for i in range(40)]
+    sparse = ["aa", "ka", "zz"]
+    index = SortedNeighborhoodIndex(
+        pd.Series(dense + sparse), threshold=4, window="adaptive",
+        prefix_length=2, min_threshold=1, max_threshold=30,
+    )
+    wide = index.lookup("sm020")
+    narrow = index.lookup("ka")
+    assert len(wide) > 8
+    assert all(k.startswith("sm") for k in pd.Series(dense + sparse)[wide])
+    assert len(narrow) <= 2
+
+
+def test_flex_sorted_neighborhood_blocking(
+    amazon_google_sample, amazon_google_field_config, amazon_google_ignored,
+):
+    from matchify.models.flex_match_model import FlexMatchModel
+    df = amazon_google_sample.copy()
+    model = FlexMatchModel(
+        df,
+        field_config=amazon_google_field_config,
+        blocking_config={"name": {"method": "sorted_neighborhood", "threshold": 5}},
+        ignored_columns=amazon_google_ignored,
+    )
+    model.train()
+    preds = model.predict(df.iloc[0].drop(labels=amazon_google_ignored))
+    assert 0 < len(preds) <= 10
+
+
+def test_blocker_unions_passes_without_duplicates():
+    from matchify.blocking import Blocker
+
+    data = pd.DataFrame({
+        "city": ["sf", "sf", "la", "ny", None],
+        "zip": ["1", "2", "2", "3", "2"],
+    })
+    blocker = Blocker(
+        {"city": {"method": "block"}, "zip": {"method": "block"}}, data,
+    )
+    record = pd.Series({"city": "sf", "zip": "2"})
+    # rows 0, 1 via city and 1, 2, 4 via zip; row 1 appears once
+    assert list(blocker.candidates(record)) == [0, 1, 2, 4]
+
+    report = blocker.report().set_index("pass")
+    assert report.loc["city", "candidates"] == 2
+    assert report.loc["zip", "candidates"] == 3
+    assert report.loc["union", "candidates"] == 4
+    assert (report["queries"] == 1).all()
+
+
+def test_blocker_composite_key_needs_every_column():
+    from matchify.blocking import Blocker
+
+    data = pd.DataFrame({
+        "first": ["ann", "ann", "bob", "ann"],
+        "last": ["lee", "kim", "lee", None],
+    })
+    blocker = Blocker({"name": {"method": "block", "fields": ["first", "last"]}}, data)
+    assert list(blocker.candidates(pd.Series({"first": "ann", "last": "lee"}))) == [0]
+    assert len(blocker.candidates(pd.Series({"first": "ann", "last": None}))) == 0
+
+
+def test_minhash_lsh_finds_reordered_names_and_persists(tmp_path):
+    from matchify.blocking import MinHashLSHIndex
+
+    names = pd.Series([
+        "apple ipod nano 8gb silver",
+        "silver 8gb ipod nano by apple",
+        "sony bravia 40 inch lcd tv",
+        "canon powershot sd1000 camera",
+        None,
+    ])
+    index_path = str(tmp_path / "lsh" / "name.npz")
+    index = MinHashLSHIndex(names, num_perm=64, bands=32, rows=2, index_path=index_path)
+    # same tokens in another order share every band, unrelated names none
+    assert list(index.lookup("apple ipod nano 8gb silver")) == [0, 1]
+    assert len(index.lookup(None)) == 0
+    assert len(index.lookup("")) == 0
+
+    reloaded = MinHashLSHIndex(names, num_perm=64, bands=32, rows=2, index_path=index_path)
+    assert np.array_equal(reloaded.signatures, index.signatures)
+    assert list(reloaded.lookup("sony bravia 40 inch lcd tv")) == [2]
+
+
+def test_flex_minhash_lsh_blocking(
+    amazon_google_sample, amazon_google_field_config, amazon_google_ignored,
+):
+    from matchify.models.flex_match_model import FlexMatchModel
+    df = amazon_google_sample.copy()
+    model = FlexMatchModel(
+        df,
+        field_config=amazon_google_field_config,
+        blocking_config={"name": {"method": "minhash_lsh", "num_perm": 64, "bands": 16, "rows": 4}},
+        ignored_columns=amazon_google_ignored,
+    )
+    model.train()
+    preds = model.predict(df.iloc[0].drop(labels=amazon_google_ignored))
+    # the record always collides with itself
+    assert df.iloc[0]['id'] in set(preds['id'])
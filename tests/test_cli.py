@@ -61,3 +61,33 @@ def test_cli_unknown_dataset_errors(tmp_path):
     )
     assert result.exit_code != 0
     assert "Unknown dataset" in result.output
+
+
+def test_cli_score_cache_reports_hits(tmp_path):
+    args = [
+        "model-comparisons", "--dataset", "synthetic-people", "--models", "flex",
+        "--limit", "30", "--output", str(tmp_path / "out.html"),
+        "--cache-dir", str(tmp_path / "cache"),
+    ]
+    first = CliRunner().invoke(cli, args)
+    assert first.exit_code == 0, first.output
+    assert "0 hits, 1 misses" in first.output
+    second = CliRunner().invoke(cli, args)
+    assert second.exit_code == 0, second.output
+    assert "1 hits, 0 misses" in second.output
+
+
+def test_cli_score_cache_applies_to_mrr_only_runs(tmp_path):
+    args = [
+        "model-comparisons", "--dataset", "synthetic-people", "--models", "flex",
+        "--limit", "30", "--output", str(tmp_path / "out.html"),
+        "--no-confusion", "--cache-dir", str(tmp_path / "cache"),
+    ]
+    first = CliRunner().invoke(cli, args)
+    assert first.exit_code == 0, first.output
+    assert "0 hits, 1 misses" in first.output
+    second = CliRunner().invoke(cli, args)
+    assert second.exit_code == 0, second.output
+    assert "1 hits, 0 misses" in second.output
+    mrr_line = [line for line in first.output.splitlines() if "MRR:" in line]
+    assert mrr_line == [line for line in second.output.splitlines() if "MRR:" in line]
@@ -0,0 +1,62 @@
+"""Tests for the on-disk embedding cache."""
+import os
+
+import numpy as np
+
+from matchify.utils.embedding_cache import EmbeddingCache
+
+
+class _CountingEncoder:
+    def __init__(self, dim=4):
+        self.dim = dim
+        self.seen = []
+
+    def __call__(self, texts):
+        self.seen.extend(texts)
+        rng = [np.random.default_rng(sum(map(ord, t))) for t in texts]
+        return np.stack([r.normal(size=self.dim) for r in rng]).astype(np.float32)
+
+
+def test_embedding_cache_only_encodes_unseen_texts(tmp_path):
+    encoder = _CountingEncoder()
+    cache = EmbeddingCache(str(tmp_path))
+    first = cache.get_or_encode("enc", ["a", "b", "a"], encoder)
+    assert encoder.seen == ["a", "b"]
+    assert np.array_equal(first[0], first[2])
+
+    # a fresh instance reads the rows back from disk, as a new process would
+    reloaded = EmbeddingCache(str(tmp_path))
+    second = reloaded.get_or_encode("enc", ["b", "c", "a"], encoder)
+    assert encoder.seen == ["a", "b", "c"]
+    assert np.array_equal(second[0], first[1])
+    assert np.array_equal(second[2], first[0])
+    assert np.array_equal(second[1], encoder(["c"])[0])
+    assert (reloaded.hits, reloaded.misses) == (2, 1)
+
+
+def test_embedding_cache_namespaces_by_encoder_key(tmp_path):
+    encoder = _CountingEncoder()
+    cache = EmbeddingCache(str(tmp_path))
+    cache.get_or_encode("base", ["a"], encoder)
+    cache.get_or_encode("base@finetuned", ["a"], encoder)
+    assert encoder.seen == ["a", "a"]
+    namespaces = os.listdir(tmp_path)
+    assert len(namespaces) == 2
+    stored = np.load(os.path.join(tmp_path, namespaces[0], "embeddings.npy"), mmap_mode="r")
+    assert stored.shape[1] == encoder.dim
+
+
+def test_embedding_cache_evicts_least_recently_used(tmp_path):
+    encoder = _CountingEncoder()
+    cache = EmbeddingCache(str(tmp_path), max_entries=3)
+    cache.get_or_encode("enc", ["a", "b", "c"], encoder)
+    cache.get_or_encode("enc", ["a"], encoder)
+    cache.get_or_encode("enc", ["c"], encoder)
+    # b is the least recently used, so it makes room for d
+    cache.get_or_encode("enc", ["d"], encoder)
+    assert cache.evictions == 1
+
+    encoder.seen.clear()
+    out = cache.get_or_encode("enc", ["a", "c", "d", "b"], encoder)
+    assert encoder.seen == ["b"]
+    assert np.array_equal(out[3], encoder(["b"])[0])
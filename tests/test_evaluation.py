@@ -75,3 +75,42 @@ def test_aggregate_pr_curves_drops_zero_zero_sentinel():
     # ramp from 0 up to 1.0 along a diagonal.
     p_at_0_1 = out[out['recall'] == 0.10]['precision'].iloc[0]
     assert p_at_0_1 == 1.0, f"expected 1.0 (plateau), got {p_at_0_1}"
+
+
+def _ranked_stub(df, ranking):
+    from matchify.models.base_model import ERBaseModel
+
+    class _Stub(ERBaseModel):
+        def preprocess(self, df, ignored_columns=None):
+            return df
+
+        def train(self, *args, **kwargs):
+            pass
+
+        def predict(self, record, **kwargs):
+            return pd.DataFrame()
+
+        def predict_many(self, records, top_k=None, **kwargs):
+            out = ranking[ranking['query_id'].isin(records.index)]
+            return out.reset_index(drop=True)
+
+    return _Stub(df)
+
+
+def test_mrr_from_group_index_skips_self_and_ungrouped_rows():
+    df = pd.DataFrame({
+        'id': [10, 11, 12, 13, 14],
+        'group_id': [1, 1, 2, 2, None],
+    })
+    ranking = pd.DataFrame({
+        # row 0: self first, then a non-match, then its match -> rr 1/2
+        # row 2: only itself -> rr 0
+        # row 4: no group -> not counted
+        'query_id':     [0, 0, 0, 2, 4],
+        'candidate_id': [0, 2, 1, 2, 3],
+        'score':        [1.0, 0.9, 0.8, 1.0, 0.9],
+        'rank':         [1, 2, 3, 1, 1],
+    })
+    model = _ranked_stub(df, ranking)
+    assert abs(model.mrr() - 0.25) < 1e-12
+    assert set(model._get_actual_matches(12)['id']) == {12, 13}
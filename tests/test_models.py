@@ -6,6 +6,7 @@ accuracy.
 """
 import warnings
 
+import numpy as np
 import pytest
 
 warnings.filterwarnings("ignore")
@@ -109,6 +110,110 @@ def test_confusion_matrix_basic(
     assert 0.0 <= cm["recall"] <= 1.0
 
 
+@pytest.mark.parametrize("model_name", ["exact", "flex", "mlp"])
+def test_predict_many_matches_predict(model_name, amazon_google_sample, amazon_google_ignored, trained_model):
+    df = amazon_google_sample
+    model = trained_model(model_name, df)
+    records = df.iloc[:5]
+    ranking = model.predict_many(records)
+    assert list(ranking.columns) == ["query_id", "candidate_id", "score", "rank"]
+    assert set(ranking["query_id"]) <= set(records.index)
+    for label, record in records.iterrows():
+        preds = model.predict(record.drop(labels=amazon_google_ignored))
+        batch = ranking[ranking["query_id"] == label]
+        assert list(batch["rank"]) == list(range(1, len(batch) + 1))
+        assert sorted(batch["score"].round(9)) == sorted(preds["score"].round(9))
+
+    top = model.predict_many(records, top_k=2)
+    assert top.groupby("query_id").size().max() <= 2
+
+
+@pytest.mark.parametrize(
+    "method", ["jaro_winkler", "levenshtein", "tfidf_cosine", "jaccard_similarity"],
+)
+def test_flex_block_scores_match_pairwise(
+    amazon_google_sample, amazon_google_ignored, amazon_google_blocking_config, method,
+):
+    from matchify.models.flex_match_model import FlexMatchModel
+    df = amazon_google_sample.copy()
+    model = FlexMatchModel(
+        df,
+        field_config={"name": {"type": "other", "comparison_method": method}},
+        blocking_config=amazon_google_blocking_config,
+        ignored_columns=amazon_google_ignored,
+    )
+    model.train()
+    positions = np.arange(len(df))
+    query = model.preprocessed_data["name"].iloc[3]
+    block = model._compare_block(query, positions, method, "name")
+    pairwise = [
+        model._compare_strings(query, other, method, "name")
+        for other in model.preprocessed_data["name"]
+    ]
+    assert np.allclose(block, pairwise)
+
+
+def test_flex_top_k_pruning_keeps_the_ranking(
+    amazon_google_sample, amazon_google_field_config, amazon_google_ignored,
+):
+    from matchify.models.flex_match_model import FlexMatchModel
+    df = amazon_google_sample.copy()
+    model = FlexMatchModel(
+        df,
+        field_config=amazon_google_field_config,
+        blocking_config={"name": {"method": "full"}},
+        ignored_columns=amazon_google_ignored,
+    )
+    model.train()
+    pruned = 0
+    for i in range(0, len(df), 10):
+        record = df.iloc[i].drop(labels=amazon_google_ignored)
+        full = model.predict(record).head(3)
+        top = model.predict(record, top_k=3)
+        assert list(top["id"]) == list(full["id"])
+        assert np.array_equal(top["score"].to_numpy(), full["score"].to_numpy())
+        pruned += top.attrs["pruned_comparisons"]
+    assert pruned > 0
+    assert model.pruning_stats["pruned"] == pruned
+
+
+def test_mlp_paired_features_match_pair_features(
+    amazon_google_sample, amazon_google_ignored,
+    amazon_google_field_config, amazon_google_blocking_config,
+):
+    from matchify.models.mlp_match_model import MLPMatchModel
+    model = MLPMatchModel(
+        amazon_google_sample.copy(),
+        field_config=amazon_google_field_config,
+        blocking_config=amazon_google_blocking_config,
+        ignored_columns=amazon_google_ignored,
+        n_pairs=60, max_iter=50,
+    )
+    model.train()
+    left, right, labels = model._sample_pair_positions()
+    assert len(left) == len(right) == len(labels) == 60
+    assert labels[:30].all() and not labels[30:].any()
+    data = model.preprocessed_data
+    expected = np.vstack([
+        model._pair_features(data.iloc[i], data.iloc[j]) for i, j in zip(left, right)
+    ])
+    assert np.allclose(model._paired_features(left, right), expected)
+    # one row-normalized CSR matrix per tfidf field, positional over df
+    for matrix in model._tfidf_matrices.values():
+        assert matrix.format == "csr" and matrix.shape[0] == len(data)
+
+
+
+def test_mlp_outside_record_ignores_colliding_index_label(amazon_google_sample, trained_model):
+    model = trained_model("mlp", amazon_google_sample)
+    record = amazon_google_sample.iloc[[50]]
+    # the same record under a label that belongs to another training row
+    relabeled = record.set_axis([3])
+    expected = model.predict_many(record).drop(columns="query_id")
+    got = model.predict_many(relabeled).drop(columns="query_id")
+    assert list(got["candidate_id"]) == list(expected["candidate_id"])
+    assert np.allclose(got["score"], expected["score"])
+
 _HAS_DEEP = (
     __import__("importlib.util").util.find_spec("sentence_transformers") is not None
 )
@@ -135,6 +240,111 @@ def test_bert_match_model(
     assert not preds.empty
 
 
+@pytest.mark.skipif(not _HAS_DEEP, reason="requires the [deep] extra")
+def test_bert_ann_full_probe_matches_exhaustive(dblp_acm_sample, amazon_google_ignored):
+    from matchify.models.bert_match_model import BertMatchModel
+    df = dblp_acm_sample.copy()
+    field_config = {"title": {}, "authors": {}, "venue": {}, "year": {}}
+    exhaustive = BertMatchModel(df, field_config=field_config, ignored_columns=amazon_google_ignored)
+    exhaustive.train()
+    # probing every cell scans the whole matrix, so the top 5 agree
+    ann = BertMatchModel(
+        df, field_config=field_config, ignored_columns=amazon_google_ignored,
+        ann_config={"backend": "numpy", "nlist": 4, "nprobe": 4},
+    )
+    ann.train()
+    queries = df.head(5).drop(columns=amazon_google_ignored)
+    expected = exhaustive.predict_many(queries, top_k=5)
+    got = ann.predict_many(queries, top_k=5)
+    assert np.allclose(got["score"], expected["score"], atol=1e-5)
+    assert len(ann.predict(queries.iloc[0], top_k=3)) == 3
+
+
+@pytest.mark.skipif(not _HAS_DEEP, reason="requires the [deep] extra")
+def test_bert_int8_embeddings_with_rescoring(dblp_acm_sample, amazon_google_ignored, tmp_path):
+    from matchify.models.bert_match_model import BertMatchModel
+    df = dblp_acm_sample.copy()
+    field_config = {"title": {}, "authors": {}, "venue": {}, "year": {}}
+    baseline = BertMatchModel(df, field_config=field_config, ignored_columns=amazon_google_ignored)
+    baseline.train()
+    compact = BertMatchModel(
+        df, field_config=field_config, ignored_columns=amazon_google_ignored,
+        embedding_dtype="int8", rescore_k=10, rescore_path=str(tmp_path / "exact.npy"),
+    )
+    compact.train()
+    assert compact.embeddings.nbytes < baseline.embeddings.nbytes / 3
+    queries = df.head(5).drop(columns=amazon_google_ignored)
+    # the rescored top candidates carry exact float32 scores
+    expected = baseline.predict_many(queries, top_k=3)
+    got = compact.predict_many(queries, top_k=3)
+    assert np.allclose(got["score"], expected["score"], atol=1e-5)
+
+
+@pytest.mark.skipif(not _HAS_DEEP, reason="requires the [deep] extra")
+def test_bert_rescoring_temp_copy_is_cleaned_up(dblp_acm_sample, amazon_google_ignored):
+    import os
+
+    from matchify.models.bert_match_model import BertMatchModel
+    df = dblp_acm_sample.copy()
+    field_config = {"title": {}, "authors": {}, "venue": {}, "year": {}}
+    model = BertMatchModel(
+        df, field_config=field_config, ignored_columns=amazon_google_ignored,
+        embedding_dtype="int8", rescore_k=10,
+    )
+    model.train()
+    first = model._exact_embeddings.path
+    assert os.path.isfile(first)
+    # retraining replaces the temp copy instead of leaving the old one behind
+    model.train()
+    second = model._exact_embeddings.path
+    assert not os.path.exists(first)
+    assert not model.predict_many(df.head(3).drop(columns=amazon_google_ignored), top_k=3).empty
+    model.close()
+    assert not os.path.exists(second)
+
+    # float32 rows are exact already, so no copy is written at all
+    plain = BertMatchModel(df, field_config=field_config, ignored_columns=amazon_google_ignored, rescore_k=10)
+    plain.train()
+    assert plain._exact_embeddings is None
+
+
+@pytest.mark.skipif(not _HAS_DEEP, reason="requires the [deep] extra")
+def test_bert_shares_compact_embeddings_across_seeds(dblp_acm_sample, amazon_google_ignored):
+    import os
+
+    from matchify.artifacts import DatasetArtifacts
+    from matchify.models.bert_match_model import BertMatchModel
+    df = dblp_acm_sample.copy()
+    field_config = {"title": {}, "authors": {}, "venue": {}, "year": {}}
+    artifacts = DatasetArtifacts("dblp_acm")
+    models = []
+    for seed in (0, 1):
+        model = BertMatchModel(
+            df, field_config=field_config, ignored_columns=amazon_google_ignored,
+            embedding_dtype="int8", rescore_k=10, random_state=seed, artifacts=artifacts,
+        )
+        model.train()
+        models.append(model)
+    first, second = models
+    assert second.embeddings is first.embeddings
+    assert second._exact_embeddings is first._exact_embeddings
+    # the bundle holds the int8 matrix, never the float32 one
+    assert not any(
+        isinstance(value, np.ndarray) and value.dtype == np.float32 and value.ndim == 2
+        for value in artifacts._entries.values()
+    )
+    queries = df.head(3).drop(columns=amazon_google_ignored)
+    assert second.predict_many(queries, top_k=3).equals(first.predict_many(queries, top_k=3))
+
+    # the shared temp copy outlives one model's close()
+    path = first._exact_embeddings.path
+    first.close()
+    assert os.path.isfile(path)
+    second.close()
+    artifacts.clear()
+    assert not os.path.exists(path)
+
+
 @pytest.mark.skipif(not _HAS_DEEP, reason="requires the [deep] extra")
 def test_siamese_match_model(
     dblp_acm_sample,
@@ -157,3 +367,57 @@ def test_siamese_match_model(
     record = df.iloc[0].drop(labels=amazon_google_ignored)
     preds = model.predict(record)
     assert not preds.empty
+
+
+def test_parallel_evaluation_matches_serial(amazon_google_sample, trained_model):
+    # small batches so the eval rows are spread over several shards
+    serial, parallel = (
+        trained_model("flex", amazon_google_sample.head(40), eval_batch_size=8) for _ in range(2)
+    )
+    assert parallel.mrr(n_jobs=2) == serial.mrr()
+    s_scores, s_labels = serial._score_all_pairs()
+    p_scores, p_labels = parallel._score_all_pairs(n_jobs=2)
+    assert np.array_equal(s_scores, p_scores)
+    assert np.array_equal(s_labels, p_labels)
+
+
+def test_exact_parallel_evaluation_under_spawn(amazon_google_sample, amazon_google_ignored, trained_model):
+    serial = trained_model("exact", amazon_google_sample)
+    parallel = trained_model("exact", amazon_google_sample, eval_batch_size=25)
+    # spawned workers get their own str hash salt, the row hashes the
+    # parent pickles into them must not depend on it
+    parallel.eval_start_method = "spawn"
+    parallel.predict(amazon_google_sample.iloc[0].drop(labels=amazon_google_ignored))
+    expected = serial._predict_eval_rows("serial", only_matches=True)
+    got = parallel._predict_eval_rows("spawn", n_jobs=2, only_matches=True)
+    assert len(got) == len(expected) > 0
+    assert got.equals(expected)
+    assert parallel.mrr(n_jobs=2) == serial.mrr()
+
+
+@pytest.mark.parametrize("model_name", ["exact", "flex"])
+def test_evaluate_matches_separate_passes(model_name, amazon_google_sample, trained_model):
+    separate, single = (trained_model(model_name, amazon_google_sample.head(60)) for _ in range(2))
+    result = single.evaluate(threshold=0.5)
+    assert result["mrr"] == separate.mrr()
+    scores, labels = separate._score_all_pairs()
+    assert np.array_equal(result["scores"], scores)
+    assert np.array_equal(result["labels"], labels)
+    assert result["confusion"] == separate.confusion_matrix(0.5)
+
+
+@pytest.mark.parametrize("model_name", ["flex", "mlp"])
+def test_shared_artifacts_match_unshared(model_name, amazon_google_sample, trained_model):
+    from matchify.artifacts import DatasetArtifacts
+
+    def mrr(seed, artifacts=None):
+        return trained_model(
+            model_name, amazon_google_sample.head(60), test_size=0.3, random_state=seed, artifacts=artifacts,
+        ).mrr()
+
+    artifacts = DatasetArtifacts("amazon_google")
+    shared = [mrr(seed, artifacts) for seed in (0, 1)]
+    # the second seed reuses everything the first one built
+    assert artifacts.hits > 0
+    assert artifacts.misses == len(artifacts)
+    assert shared == [mrr(seed) for seed in (0, 1)]
@@ -18,6 +18,9 @@ class _StubModel(ERBaseModel):
     def predict(self, record, **kwargs):
         return pd.DataFrame()
 
+    def predict_many(self, records, top_k=None, **kwargs):
+        return pd.DataFrame()
+
 
 @pytest.fixture
 def model():
@@ -62,3 +65,59 @@ def test_normalize_date_iso(model):
     assert model._normalize_date("1959-10-13") == "1959-10-13"
     assert model._normalize_date("Mar 5, 1990") == "1990-03-05"
     assert model._normalize_date("not-a-date") == ""
+
+
+def test_normalizer_cache_counts_hits_and_evicts():
+    from matchify.utils.normalizers import NormalizerCache
+
+    calls = []
+    cache = NormalizerCache(lambda v: calls.append(v) or str(v).upper(), maxsize=2)
+    assert cache("a") == "A"
+    assert cache("a") == "A"
+    cache("b")
+    cache("c")  # evicts "a", the least recently used
+    assert cache("a") == "A"
+    assert calls == ["a", "b", "c", "a"]
+    assert cache.stats() == {"size": 2, "maxsize": 2, "hits": 1, "misses": 4, "evictions": 2}
+    # non-str values are never cached
+    assert cache(None) == "NONE"
+    assert len(cache) == 2
+
+
+def test_model_normalizers_share_the_process_cache(model):
+    from matchify.utils import normalizers
+
+    normalizers.clear_caches()
+    other = _StubModel(pd.DataFrame())
+    model._normalize_phone("(415) 555-1234")
+    other._normalize_phone("(415) 555-1234")
+    stats = normalizers.cache_stats()["phone"]
+    assert stats["misses"] == 1
+    assert stats["hits"] == 1
+
+
+def test_parallel_normalize_column_matches_serial():
+    from matchify.utils.normalizers import normalize_column
+
+    phones = pd.Series(
+        ["(415) 555-1234", "garbage", "", "+44 20 7946 0958", "415.555.1234"] * 4,
+        index=range(100, 120), name="phone",
+    )
+    serial = normalize_column("phone", phones)
+    parallel = normalize_column("phone", phones, n_jobs=2, min_parallel_rows=0)
+    pd.testing.assert_series_equal(parallel, serial)
+
+
+@pytest.mark.parametrize("kind, values", [
+    ("phone", ["(415) 555-1234", "415.555.1234", "+1 415 555 1234", "1-800-555-1234",
+               "(012) 555-1234", "+44 20 7946 0958", "415-555-1234x12", "garbage", ""]),
+    ("date", ["1959-10-13", "3/5/1990", "03/05/1990", "13/05/1990", "02/30/2020",
+              "1899-01-01", "Mar 5, 1990", "not-a-date", ""]),
+    ("name", ["John Smith", " john  smith ", "Smith", "José Núñez", "Dr Smith",
+              "John Smith Jr", "Van Dyke", "Mary-Jane O'Neil III", "a b c", ""]),
+])
+def test_vectorized_fast_paths_match_library(kind, values):
+    from matchify.utils.normalizers import NORMALIZERS, normalize_column
+
+    column = pd.Series(values, dtype=object)
+    assert list(normalize_column(kind, column)) == [NORMALIZERS[kind](v) for v in values]
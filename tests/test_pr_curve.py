@@ -49,6 +49,34 @@ def test_pr_curve_default_uses_observed_scores(
         assert b <= a + 1e-9
 
 
+def test_pr_curve_full_resolution_matches_confusion_matrix(
+    amazon_google_sample, amazon_google_field_config,
+    amazon_google_blocking_config, amazon_google_ignored,
+):
+    import numpy as np
+
+    from matchify.models.flex_match_model import FlexMatchModel
+    df = amazon_google_sample.copy()
+    model = FlexMatchModel(
+        df,
+        field_config=amazon_google_field_config,
+        blocking_config=amazon_google_blocking_config,
+        ignored_columns=amazon_google_ignored,
+    )
+    model.train()
+    curve = model.pr_curve(full_resolution=True)
+    scores, labels = model._score_all_pairs()
+    # one row per distinct score, plus the 0.0 and sentinel anchors
+    assert len(curve) >= len(np.unique(scores))
+    for _, row in curve.sample(5, random_state=0).iterrows():
+        cm = model.confusion_matrix(row['threshold'])
+        assert (cm['tp'], cm['fp'], cm['tn'], cm['fn']) == (row['tp'], row['fp'], row['tn'], row['fn'])
+        # brute-force check against the raw pairs
+        predicted = np.asarray(scores) >= row['threshold']
+        assert cm['tp'] == int(np.sum(predicted & labels))
+        assert cm['fp'] == int(np.sum(predicted & ~labels))
+
+
 def test_pr_curve_handles_binary_scorer(
     amazon_google_sample, amazon_google_ignored,
 ):
@@ -0,0 +1,70 @@
+"""Tests for the compact embedding storage."""
+import os
+import pickle
+
+import numpy as np
+import pytest
+
+from matchify import quantization
+from matchify.ann import IVFFlatIndex
+
+
+def _normalized(n=500, dim=32, seed=0):
+    vectors = np.random.default_rng(seed).normal(size=(n, dim))
+    return (vectors / np.linalg.norm(vectors, axis=1, keepdims=True)).astype(np.float32)
+
+
+@pytest.mark.parametrize("dtype, ratio, atol", [("float16", 2, 1e-3), ("int8", 4, 2e-2)])
+def test_quantized_scores_track_float32(dtype, ratio, atol):
+    vectors = _normalized()
+    matrix = quantization.quantize(vectors, dtype)
+    assert matrix.nbytes <= vectors.nbytes / ratio + 4 * len(vectors)
+    query = vectors[0]
+    positions = np.arange(len(vectors))[::3]
+    scores = quantization.score_rows(matrix, query, positions)
+    assert scores.dtype == np.float32
+    assert np.allclose(scores, vectors[positions] @ query, atol=atol)
+    assert np.array_equal(scores, matrix[positions] @ query)
+
+
+def test_quantize_float32_is_the_plain_array():
+    vectors = _normalized(n=10)
+    assert quantization.quantize(vectors, "float32") is vectors
+    with pytest.raises(ValueError):
+        quantization.quantize(vectors, "int4")
+
+
+def test_rescore_top_restores_exact_scores(tmp_path):
+    vectors = _normalized()
+    exact = quantization.write_exact_copy(vectors, str(tmp_path / "exact.npy"))
+    matrix = quantization.quantize(vectors, "int8")
+    query = vectors[7]
+    positions = np.arange(len(vectors))
+    approx = quantization.score_rows(matrix, query, positions)
+    rescored = quantization.rescore_top(approx, positions, query, exact, k=10)
+    top = np.argsort(-rescored)[:10]
+    assert np.allclose(rescored[top], vectors[top] @ query, atol=1e-6)
+    assert top[0] == 7
+    # only the path is pickled, the copy reopens its memmap lazily
+    assert np.array_equal(pickle.loads(pickle.dumps(exact))[[1, 2]], vectors[[1, 2]])
+
+
+def test_ivf_index_over_quantized_embeddings():
+    vectors = _normalized()
+    index = IVFFlatIndex(quantization.quantize(vectors, "int8"), nlist=8)
+    _, positions = index.search(vectors[:5], 1, nprobe=8)
+    assert list(positions[:, 0]) == [0, 1, 2, 3, 4]
+
+
+def test_temp_exact_copy_is_deleted_by_its_owner():
+    vectors = _normalized(n=20)
+    exact = quantization.write_exact_copy(vectors)
+    assert os.path.isfile(exact.path)
+    # a pickled copy (an evaluation worker) reads the file but never deletes it
+    worker = pickle.loads(pickle.dumps(exact))
+    assert np.array_equal(worker[[3]], vectors[[3]])
+    del worker
+    assert os.path.isfile(exact.path)
+    path = exact.path
+    del exact
+    assert not os.path.exists(path)
@@ -0,0 +1,57 @@
+"""Tests for the micro-batching query encoder."""
+import pickle
+import threading
+
+import numpy as np
+import pytest
+
+from matchify.utils.query_batcher import QueryBatcher
+
+
+def _encode(texts):
+    return np.array([[len(t), ord(t[0])] for t in texts], dtype=np.float32)
+
+
+def test_query_batcher_batches_concurrent_calls():
+    batch_sizes = []
+    barrier = threading.Barrier(8)
+
+    def encode(texts):
+        batch_sizes.append(len(texts))
+        return _encode(texts)
+
+    batcher = QueryBatcher(encode, max_batch_size=8, wait_ms=2000)
+    texts = [chr(ord("a") + i) * (i + 1) for i in range(8)]
+    results = {}
+
+    def call(text):
+        barrier.wait()
+        results[text] = batcher.encode(text)
+
+    threads = [threading.Thread(target=call, args=(t,)) for t in texts]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    # a full batch doesn't wait out wait_ms
+    assert batch_sizes == [8]
+    for text in texts:
+        assert np.array_equal(results[text], _encode([text])[0])
+    assert batcher.mean_batch_size() == 8
+
+
+def test_query_batcher_single_call_and_errors():
+    batcher = QueryBatcher(_encode, max_batch_size=4, wait_ms=1)
+    assert np.array_equal(batcher.encode("abc"), _encode(["abc"])[0])
+    assert batcher.batches == 1
+
+    def fail(texts):
+        raise RuntimeError("encoder down")
+
+    with pytest.raises(RuntimeError):
+        QueryBatcher(fail, wait_ms=0).encode("abc")
+
+
+def test_query_batcher_pickles_without_its_queue():
+    batcher = pickle.loads(pickle.dumps(QueryBatcher(_encode, wait_ms=0)))
+    assert np.array_equal(batcher.encode("xy"), _encode(["xy"])[0])
@@ -0,0 +1,68 @@
+"""Tests for the on-disk evaluation ranking cache."""
+import copy
+import warnings
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from matchify.utils.score_cache import ScoreCache
+
+warnings.filterwarnings("ignore")
+
+
+def _flex(df, field_config, blocking_config, ignored):
+    from matchify.models.flex_match_model import FlexMatchModel
+    model = FlexMatchModel(
+        df.copy(),
+        field_config=copy.deepcopy(field_config),
+        blocking_config=copy.deepcopy(blocking_config),
+        ignored_columns=ignored,
+    )
+    model.train()
+    return model
+
+
+def test_score_cache_hit_miss_and_invalidation(
+    tmp_path, amazon_google_sample, amazon_google_field_config,
+    amazon_google_blocking_config, amazon_google_ignored,
+):
+    df = amazon_google_sample.head(40)
+    cache = ScoreCache(str(tmp_path))
+
+    first = _flex(df, amazon_google_field_config, amazon_google_blocking_config, amazon_google_ignored)
+    cold = first.evaluate(cache=cache, cache_name="ag")
+    assert cache.last_status == "miss"
+
+    second = _flex(df, amazon_google_field_config, amazon_google_blocking_config, amazon_google_ignored)
+    warm = second.evaluate(cache=cache, cache_name="ag")
+    assert cache.last_status == "hit"
+    assert warm["mrr"] == cold["mrr"]
+    assert np.array_equal(warm["scores"], cold["scores"])
+    assert warm["confusion"] == cold["confusion"]
+
+    # a config change lands in the same slot with a different key
+    field_config = copy.deepcopy(amazon_google_field_config)
+    field_config["name"]["comparison_method"] = "levenshtein"
+    third = _flex(df, field_config, amazon_google_blocking_config, amazon_google_ignored)
+    third.evaluate(cache=cache, cache_name="ag")
+    assert cache.last_status == "invalidated"
+    assert (cache.hits, cache.misses, cache.invalidations) == (1, 1, 1)
+
+
+def test_score_cache_failed_store_leaves_a_miss(
+    tmp_path, amazon_google_sample, amazon_google_field_config,
+    amazon_google_blocking_config, amazon_google_ignored,
+):
+    cache = ScoreCache(str(tmp_path))
+    model = _flex(amazon_google_sample.head(40), amazon_google_field_config,
+                  amazon_google_blocking_config, amazon_google_ignored)
+    model.evaluate(cache=cache, cache_name="ag")
+    assert cache.load(model, "ag") is not None
+
+    # mixed types in one column can't be written to parquet
+    broken = pd.DataFrame({"query_id": [1, "a"], "candidate_id": [1, 2], "score": [1.0, 0.5], "rank": [1, 2]})
+    with pytest.raises(ValueError):
+        cache.store(model, broken, "ag")
+    assert cache.load(model, "ag") is None
+    assert cache.last_status == "miss"
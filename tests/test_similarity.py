@@ -0,0 +1,51 @@
+"""Tests for the batched similarity kernels."""
+import jellyfish
+import numpy as np
+import pytest
+import textdistance
+
+from matchify import similarity
+
+STRINGS = ["apple ipod nano", "Apple iPod Nano 8GB", "", "sony", "nan", "ipod, nano!", "zune"]
+
+
+@pytest.mark.parametrize("method, scalar", [
+    ("jaro_winkler", jellyfish.jaro_winkler_similarity),
+    ("levenshtein", textdistance.levenshtein.normalized_similarity),
+])
+def test_kernels_match_scalar_functions(method, scalar):
+    expected = np.array([[scalar(a, b) for b in STRINGS] for a in STRINGS])
+    matrix = similarity.many_to_many(STRINGS, STRINGS, method, dtype=np.float64)
+    assert np.array_equal(matrix, expected)
+    assert np.array_equal(
+        similarity.one_to_many(STRINGS[0], STRINGS, method, dtype=np.float64), expected[0]
+    )
+    assert np.array_equal(
+        similarity.paired(STRINGS, STRINGS[::-1], method, dtype=np.float64),
+        [scalar(a, b) for a, b in zip(STRINGS, STRINGS[::-1])],
+    )
+
+
+def test_jaccard_kernel_and_defaults():
+    scores = similarity.one_to_many("apple ipod nano", STRINGS, "jaccard_similarity")
+    assert scores.dtype == np.float32
+    assert scores[0] == 1.0
+    assert scores[5] == pytest.approx(2 / 3)
+    assert scores[2] == 0.0
+    assert similarity.many_to_many([], STRINGS, "jaccard").shape == (0, len(STRINGS))
+    with pytest.raises(ValueError):
+        similarity.get_kernel("soundex")
+
+
+def test_token_store_jaccard_matches_token_sets():
+    store = similarity.TokenStore(STRINGS)
+    sets = [similarity.tokenize(s) for s in STRINGS]
+    positions = np.arange(len(STRINGS))
+    assert store.tokens.dtype == np.int32
+    assert store.token_set(1) == sets[1]
+    for query in ["apple ipod", "ipod unseen-token", ""]:
+        expected = [similarity.jaccard(similarity.tokenize(query), other) for other in sets]
+        assert np.array_equal(store.jaccard(store.encode(query), positions), expected)
+    left, right = [0, 1, 2, 5], [1, 5, 2, 0]
+    expected = [similarity.jaccard(sets[a], sets[b]) for a, b in zip(left, right)]
+    assert np.array_equal(store.paired_jaccard(left, right), expected)